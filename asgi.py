@@ -0,0 +1,247 @@
+"""ASGI entry point with async handlers for the hot read and check-in routes.
+
+Run with::
+
+    uvicorn asgi:application --workers 2
+
+The routes below run on an async SQLAlchemy engine (asyncpg, aiomysql or
+aiosqlite, derived from DATABASE_URL or set with ASYNC_DATABASE_URL), so
+a request waiting on the database does not hold a thread. They share
+models.py, schema.py and the loading plans with the Flask app and return
+the same JSON. Every other route falls through to the Flask app, mounted
+as WSGI, so one server serves the whole API.
+
+Response caching, metrics and token auth are Flask hooks and only apply
+to the routes served by Flask. The async sessions derive from
+``AppSession``, so their writes still update the attendance summaries,
+the SSE feed, the scheduler and cache invalidation. Idempotency-Key handling is wrapped
+around the async POST route as well and shares the Flask app's store.
+
+bench/asgi_vs_wsgi.py starts this app and the Flask development server
+on the same database and load-tests both at increasing concurrency.
+"""
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import NotFound
+
+from app import create_app
+from extensions import idempotency_keys, session_scheduler
+from idempotency import HEADER
+from loading import load_plan
+from models import User, Organization, AttendanceRecord
+from scheduler import OPEN
+from summaries import organization_summary, organization_summary_query, user_summary, user_summary_queries
+from reports import attendance_stats, attendance_stats_queries
+from routing import AppSession
+from views import parse_date_range, parse_page_args
+from schema import (
+    user_schema, users_schema, users_summary_schema,
+    organization_schema, organizations_schema, organizations_summary_schema,
+    attendance_record_schema,
+)
+
+# Driver async untuk setiap driver sinkron yang dipakai DATABASE_URL
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+flask_app = create_app()
+
+USER_LIST_SCHEMAS = {
+    'full': (users_schema, 'user'),
+    'summary': (users_summary_schema, 'user_summary'),
+}
+ORGANIZATION_LIST_SCHEMAS = {
+    'full': (organizations_schema, 'organization'),
+    'summary': (organizations_summary_schema, 'organization_summary'),
+}
+
+
+def async_database_url(url):
+    scheme, sep, rest = url.partition('://')
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+engine = create_async_engine(
+    flask_app.config.get('ASYNC_DATABASE_URL') or async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+)
+# Turunan AppSession supaya listener flush/commit (ringkasan presensi, feed
+# SSE, invalidasi cache, scheduler) juga berjalan untuk tulisan lewat ASGI
+async_session = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=AppSession)
+
+
+def error(message, status_code):
+    return JSONResponse({'status': 'error', 'message': message}, status_code=status_code)
+
+
+async def _list(request, model, variants, name):
+    variant = variants.get(request.query_params.get('fields', 'full'))
+    if variant is None:
+        return error('fields must be one of: ' + ', '.join(variants), 400)
+    try:
+        limit, cursor = parse_page_args(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    schema, plan = variant
+    query = select(model).options(*load_plan(plan)).order_by(model.id).limit(limit + 1)
+    if cursor is not None:
+        query = query.where(model.id > cursor)
+    async with async_session() as session:
+        rows = (await session.scalars(query)).all()
+
+    if not rows:
+        return JSONResponse({'status': 'not found', 'message': name + ' not found', 'data': [], 'next_cursor': None})
+    return JSONResponse({
+        'status': 'success',
+        'data': schema.dump(rows[:limit]),
+        'next_cursor': rows[limit - 1].id if len(rows) > limit else None,
+        'message': name + 's found',
+    })
+
+
+async def _detail(request, model, schema, plan, name, summary):
+    async with async_session() as session:
+        obj = await session.get(model, request.path_params['id'], options=load_plan(plan))
+        if obj is None:
+            return error(str(NotFound()), 404)
+        data = schema.dump(obj)
+        data['attendance_summary'] = await summary(session, obj.id)
+    return JSONResponse({'status': 'success', 'data': data, 'message': name + ' found'})
+
+
+async def _user_summary(session, id):
+    summary_query, session_query = user_summary_queries(id)
+    return user_summary((await session.execute(summary_query)).all(), (await session.execute(session_query)).all())
+
+
+async def _organization_summary(session, id):
+    return organization_summary((await session.execute(organization_summary_query(id))).all())
+
+
+async def get_users(request):
+    return await _list(request, User, USER_LIST_SCHEMAS, 'user')
+
+
+async def get_user(request):
+    return await _detail(request, User, user_schema, 'user', 'user', _user_summary)
+
+
+async def get_organizations(request):
+    return await _list(request, Organization, ORGANIZATION_LIST_SCHEMAS, 'organization')
+
+
+async def get_organization(request):
+    return await _detail(request, Organization, organization_schema, 'organization', 'organization',
+                         _organization_summary)
+
+
+async def get_attendance_stats(request):
+    org_id = request.path_params['id']
+    try:
+        start, end = parse_date_range(request.query_params)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    member_query, session_query = attendance_stats_queries(org_id, start, end)
+    async with async_session() as session:
+        if await session.get(Organization, org_id) is None:
+            return error('organization not found', 404)
+        member_rows = (await session.execute(member_query)).all()
+        session_rows = (await session.execute(session_query)).all()
+
+    return JSONResponse({
+        'status': 'success',
+        'data': attendance_stats(org_id, start, end, member_rows, session_rows),
+        'message': 'attendance stats found',
+    })
+
+
+def idempotent(handler):
+    """Apply the Flask app's Idempotency-Key handling (idempotency.py) to an async POST route."""
+    @wraps(handler)
+    async def decorated(request):
+        key = request.headers.get(HEADER)
+        if not key:
+            return await handler(request)
+        store_key, fingerprint, stored = idempotency_keys.reserve(
+            request.method, request.url.path, key, await request.body())
+        if stored is not None:
+            status, body, headers = stored
+            return Response(body, status_code=status, headers=headers)
+        try:
+            response = await handler(request)
+        except BaseException:
+            idempotency_keys.release(store_key)
+            raise
+        idempotency_keys.store(store_key, fingerprint, response.status_code, response.body, response.headers)
+        return response
+    return decorated
+
+
+@idempotent
+async def fill_presence(request):
+    data = await request.json()
+    attendance_session_id = data.get('attendance_session_id')
+    if not isinstance(attendance_session_id, int) or not isinstance(data.get('user_id'), int) or not data.get('status'):
+        return error('attendance_session_id, user_id and status are required', 400)
+    # Biasanya dijawab dari memori; hanya sesi yang belum dikenal dicari di database
+    with flask_app.app_context():
+        state = session_scheduler.state(attendance_session_id)
+    if state is None:
+        return error('attendance session not found', 404)
+    if state != OPEN:
+        return error('attendance session is %s and not accepting check-ins' % state, 409)
+
+    async with async_session() as session:
+        new_presence = AttendanceRecord(
+            user_id=data.get('user_id'),
+            attendance_session_id=attendance_session_id,
+            status=data.get('status'),
+        )
+        session.add(new_presence)
+        try:
+            await session.commit()
+        except IntegrityError:
+            return error('user already has a presence in this attendance session', 409)
+        new_presence = await session.get(AttendanceRecord, new_presence.id, options=load_plan('attendance_record'),
+                                         populate_existing=True)
+
+    return JSONResponse({
+        'status': 'success',
+        'data': attendance_record_schema.dump(new_presence),
+        'message': 'Presence filled successfully',
+    }, status_code=201)
+
+
+routes = [
+    Route('/api/users', get_users, methods=['GET']),
+    Route('/api/users/{id:int}', get_user, methods=['GET']),
+    Route('/api/organizations', get_organizations, methods=['GET']),
+    Route('/api/organizations/{id:int}', get_organization, methods=['GET']),
+    Route('/api/organizations/{id:int}/attendance-stats', get_attendance_stats, methods=['GET']),
+    Route('/api/presences', fill_presence, methods=['POST']),
+    # Semua route lain dilayani app Flask
+    Mount('/', app=WSGIMiddleware(flask_app)),
+]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+application = Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,58 @@
+from collections import namedtuple
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+# Data user yang dibawa token, cukup untuk otorisasi tanpa query ke DB
+TokenUser = namedtuple('TokenUser', ['id', 'email', 'role'])
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='auth-token')
+
+
+def generate_token(user):
+    """Return a signed token for ``user`` that expires after TOKEN_MAX_AGE."""
+    return _serializer().dumps({'id': user.id, 'email': user.email, 'role': user.role})
+
+
+def verify_token(token):
+    """Return the TokenUser for ``token``.
+
+    Raises ``SignatureExpired`` for expired tokens and ``BadSignature``
+    for anything that was not signed with our SECRET_KEY.
+    """
+    data = _serializer().loads(token, max_age=current_app.config['TOKEN_MAX_AGE'])
+    return TokenUser(data['id'], data['email'], data['role'])
+
+
+def token_required(f):
+    """Require an ``Authorization: Bearer <token>`` header.
+
+    The verified user is available as ``g.current_user``.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return jsonify({
+                'status': 'error',
+                'message': 'missing bearer token'
+            }), 401
+
+        try:
+            g.current_user = verify_token(token)
+        except SignatureExpired:
+            return jsonify({
+                'status': 'error',
+                'message': 'token expired'
+            }), 401
+        except BadSignature:
+            return jsonify({
+                'status': 'error',
+                'message': 'invalid token'
+            }), 401
+
+        return f(*args, **kwargs)
+    return decorated
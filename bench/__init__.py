@@ -0,0 +1 @@
+"""Benchmarks for the dojo API. Run modules with ``python -m bench.<name>``."""
@@ -0,0 +1,100 @@
+"""Check that check-ins posted through asgi.py run the same session listeners as Flask.
+
+Usage::
+
+    python -m bench.asgi_listeners
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.asgi_listeners --reset
+
+Without DATABASE_URL a throwaway SQLite file is used. Posts one check-in
+through ``asgi.application`` and one through the Flask app, then checks
+that both updated attendance_summaries, reached the SSE feed and
+invalidated the cached user response. Prints one line per check and
+exits non-zero if any fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+_db_file = None
+if not os.environ.get('DATABASE_URL'):
+    _db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from sqlalchemy import select
+from starlette.testclient import TestClient
+
+# app Flask milik asgi.py, supaya kedua sisi memakai extension yang sama
+from asgi import application, flask_app as app
+from bench import datagen
+from extensions import attendance_feed
+from models import db, User, AttendanceSummary
+
+
+def summary_count(user_id):
+    with app.app_context():
+        return db.session.scalar(
+            select(AttendanceSummary.count).where(AttendanceSummary.user_id == user_id, AttendanceSummary.status == 'hadir')
+        )
+
+
+def check_in(post, client, session_id, user_id):
+    """Post one check-in with ``post``; return (status, count, feed event, cached summary changed)."""
+    before = client.get('/api/users/%d' % user_id).json['data']['attendance_summary']
+    subscription = attendance_feed.subscribe(session_id)
+    try:
+        status = post('/api/presences', json={'user_id': user_id, 'attendance_session_id': session_id,
+                                               'status': 'hadir'}).status_code
+        message = subscription.get(timeout=2)
+    finally:
+        subscription.close()
+    after = client.get('/api/users/%d' % user_id).json['data']['attendance_summary']
+    return status, summary_count(user_id), message is not None and message[0] == 'record', after != before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reset', action='store_true',
+                        help='drop and recreate all tables (always done for the throwaway SQLite database)')
+    args = parser.parse_args(argv)
+
+    try:
+        with app.app_context():
+            if args.reset or _db_file is not None:
+                datagen.reset_database()
+            elif db.session.query(User).first() is not None:
+                parser.error('database is not empty, pass --reset to wipe it')
+            datagen.generate(orgs=1, members=2, sessions=0, password_method='pbkdf2:sha256:1')
+
+        client = app.test_client()
+        session_id = client.post('/api/add-presences', json={
+            'user_id': 1, 'org_id': 1, 'date': date.today().isoformat(),
+            'time_open': '00:00:00', 'time_close': '23:59:59'}).json['data']['id']
+
+        with TestClient(application) as asgi_client:
+            asgi_status, asgi_count, asgi_feed, asgi_cache = check_in(asgi_client.post, client, session_id, 2)
+        flask_status, flask_count, flask_feed, flask_cache = check_in(client.post, client, session_id, 3)
+
+        checks = [
+            ('ASGI check-in accepted', asgi_status == 201),
+            ('ASGI check-in counted in attendance_summaries', asgi_count == 1),
+            ('ASGI check-in published to the SSE feed', asgi_feed),
+            ('ASGI check-in invalidated the cached user', asgi_cache),
+            ('Flask check-in accepted', flask_status == 201),
+            ('Flask check-in counted in attendance_summaries', flask_count == 1),
+            ('Flask check-in published to the SSE feed', flask_feed),
+            ('Flask check-in invalidated the cached user', flask_cache),
+        ]
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+    for name, ok in checks:
+        print('%-60s %s' % (name, 'ok' if ok else 'FAILED'))
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
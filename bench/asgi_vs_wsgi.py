@@ -0,0 +1,122 @@
+"""Load-test the Flask (WSGI) and Starlette (ASGI) servers side by side.
+
+Usage::
+
+    python -m bench.asgi_vs_wsgi --members 100 --concurrency 8 32 128 --duration 10
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.asgi_vs_wsgi --reset
+
+Seeds one database with bench.datagen, then starts ``flask run
+--with-threads`` and ``uvicorn asgi:application`` on it one after the
+other and runs bench.http_load against the routes asgi.py serves
+natively, at each concurrency level. Prints requests per second and
+latency percentiles per server and level as JSON.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+_db_file = None
+if not os.environ.get('DATABASE_URL'):
+    _db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from app import create_app
+from bench import datagen, http_load
+from models import db, User
+
+app = create_app()
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'flask', '--app', 'app', 'run', '--with-threads', '--port', str(port)],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning'],
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(base_url, process, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('server exited with code %d' % process.returncode)
+        try:
+            with urllib.request.urlopen(base_url + '/api/organizations/1', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start within %d seconds' % timeout)
+
+
+def bench_server(name, levels, duration, workers):
+    port = _free_port()
+    base_url = 'http://127.0.0.1:%d' % port
+    # Metrics dan cache hanya ada di Flask; matikan supaya perbandingannya setara
+    env = dict(os.environ, METRICS_ENABLED='false', RESPONSE_CACHE_SIZE='0')
+    process = subprocess.Popen(SERVERS[name](port, workers), env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(base_url, process)
+        results = {}
+        for concurrency in levels:
+            report = http_load.run(base_url, concurrency=concurrency, duration=duration)
+            endpoints = report['endpoints'].values()
+            results[concurrency] = {
+                'rps': round(sum(e['throughput_rps'] for e in endpoints), 1),
+                'errors': sum(e['errors'] for e in endpoints),
+                'endpoints': report['endpoints'],
+            }
+        return results
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--duration', type=float, default=10, help='seconds per concurrency level')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+    parser.add_argument('--server', choices=sorted(SERVERS), action='append', dest='servers')
+    parser.add_argument('--reset', action='store_true',
+                        help='drop and recreate all tables (always done for the throwaway SQLite database)')
+    args = parser.parse_args(argv)
+
+    try:
+        with app.app_context():
+            if args.reset or _db_file is not None:
+                datagen.reset_database()
+            elif db.session.query(User).first() is not None:
+                parser.error('database is not empty, pass --reset to wipe it')
+            summary = datagen.generate(args.orgs, args.members, args.sessions, args.attendance, args.seed,
+                                       app.config.get('PASSWORD_HASH_METHOD'))
+
+        report = {
+            'dataset': summary,
+            'servers': {name: bench_server(name, args.concurrency, args.duration, args.workers)
+                        for name in args.servers or sorted(SERVERS)},
+        }
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Compare two JSON baselines written by bench.run.
+
+Usage::
+
+    python -m bench.compare old.json new.json
+
+Prints the relative change of p50/p99 latency and SQL query count for
+every endpoint present in both files.
+"""
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p99_ms', 'sql_queries_avg')
+
+
+def change(old, new):
+    if not old:
+        return 'n/a'
+    return '%+.1f%%' % ((new - old) / old * 100)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)['endpoints']
+    with open(args.new) as f:
+        new = json.load(f)['endpoints']
+
+    print('%-48s %s' % ('endpoint', '  '.join('%-24s' % metric for metric in METRICS)))
+    for name in sorted(old.keys() & new.keys()):
+        cells = ['%-24s' % ('%s -> %s (%s)' % (old[name][m], new[name][m], change(old[name][m], new[name][m])))
+                 for m in METRICS]
+        print('%-48s %s' % (name, '  '.join(cells)))
+    for name in sorted(old.keys() ^ new.keys()):
+        print('%-48s only in %s' % (name, args.old if name in old else args.new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Generate synthetic dojo data at a configurable scale.
+
+Usage::
+
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.datagen --orgs 20 --members 100 --reset
+
+Every organization gets ``members`` athletes (plus its coach),
+``sessions`` attendance sessions spread over the past weeks, and a
+record for roughly ``attendance`` of its members in each session.
+All users share the password ``secret``.
+"""
+import argparse
+import random
+from datetime import date, time, timedelta
+
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
+import summaries
+from models import db, User, Organization, OrgMember, AttendanceSession, AttendanceRecord
+
+PASSWORD = 'secret'
+STATUSES = ('hadir', 'hadir', 'hadir', 'izin', 'sakit', 'alpha')
+BATCH_SIZE = 5000
+
+
+def _insert(model, rows):
+    for i in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[i:i + BATCH_SIZE])
+
+
+def _sync_sequences():
+    # Id diisi manual, jadi sequence PostgreSQL harus dimajukan
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in (User, Organization, OrgMember, AttendanceSession, AttendanceRecord):
+        table = model.__tablename__
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('%s', 'id'), COALESCE(MAX(id), 1)) FROM %s" % (table, table)
+        ))
+
+
+def generate(orgs=5, members=50, sessions=20, attendance=0.8, seed=0, password_method=None):
+    """Insert a synthetic dataset and return a summary of what was created.
+
+    Must run inside an app context on an empty database; ids are assigned
+    here so related rows can be inserted with plain executemany batches.
+    """
+    rng = random.Random(seed)
+    pwhash = generate_password_hash(PASSWORD, method=password_method) if password_method else generate_password_hash(PASSWORD)
+
+    users, organizations, org_members, attendance_sessions, records = [], [], [], [], []
+    user_id = session_id = record_id = 0
+    today = date.today()
+
+    for org_id in range(1, orgs + 1):
+        user_id += 1
+        coach_id = user_id
+        users.append({'id': coach_id, 'name': 'Coach %d' % org_id, 'email': 'coach%d@bench.local' % org_id,
+                      'password': pwhash, 'role': 'pelatih'})
+        organizations.append({'id': org_id, 'name': 'Dojo %d' % org_id, 'enroll_code': 'DOJO%d' % org_id,
+                              'user_id': coach_id})
+
+        member_ids = [coach_id]
+        for _ in range(members):
+            user_id += 1
+            member_ids.append(user_id)
+            users.append({'id': user_id, 'name': 'Athlete %d' % user_id, 'email': 'athlete%d@bench.local' % user_id,
+                          'password': pwhash, 'role': 'atlet'})
+        org_members.extend({'org_id': org_id, 'user_id': member_id} for member_id in member_ids)
+
+        for n in range(sessions):
+            session_id += 1
+            attendance_sessions.append({'id': session_id, 'date': today - timedelta(days=7 * (sessions - n)),
+                                        'status': 'closed', 'time_open': time(16, 0), 'time_close': time(18, 0),
+                                        'user_id': coach_id, 'org_id': org_id})
+            for member_id in member_ids[1:]:
+                if rng.random() < attendance:
+                    record_id += 1
+                    records.append({'id': record_id, 'attendance_session_id': session_id,
+                                    'user_id': member_id, 'status': rng.choice(STATUSES)})
+
+    _insert(User, users)
+    _insert(Organization, organizations)
+    _insert(OrgMember, org_members)
+    _insert(AttendanceSession, attendance_sessions)
+    _insert(AttendanceRecord, records)
+    _sync_sequences()
+    db.session.commit()
+    # Record dimasukkan lewat Core, jadi ringkasan presensi dihitung sekali di sini
+    summaries.rebuild(range(1, orgs + 1))
+
+    return {
+        'users': len(users),
+        'organizations': len(organizations),
+        'org_members': len(org_members),
+        'attendance_sessions': len(attendance_sessions),
+        'attendance_records': len(records),
+    }
+
+
+def reset_database():
+    db.drop_all()
+    db.create_all()
+
+
+def add_arguments(parser):
+    parser.add_argument('--orgs', type=int, default=5)
+    parser.add_argument('--members', type=int, default=50, help='athletes per organization')
+    parser.add_argument('--sessions', type=int, default=20, help='attendance sessions per organization')
+    parser.add_argument('--attendance', type=float, default=0.8, help='share of members checked in per session')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main(argv=None):
+    from app import create_app
+    app = create_app()
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if args.reset:
+            reset_database()
+        print(generate(args.orgs, args.members, args.sessions, args.attendance, args.seed,
+                       app.config.get('PASSWORD_HASH_METHOD')))
+
+
+if __name__ == '__main__':
+    main()
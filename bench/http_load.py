@@ -0,0 +1,88 @@
+"""Concurrent HTTP load generator for a running API server.
+
+Usage::
+
+    python -m bench.run ...                       # or seed with bench.datagen
+    flask --app app run --port 5000 &
+    python -m bench.http_load http://127.0.0.1:5000 --concurrency 32 --duration 30
+
+Hits a mix of read endpoints from many threads at once, the way dashboards
+and athletes' phones do at the start of training, and prints per-path
+throughput and latency percentiles as JSON.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.stats import summarize
+
+DEFAULT_PATHS = [
+    '/api/users?fields=summary',
+    '/api/users/2',
+    '/api/organizations?fields=summary',
+    '/api/organizations/1',
+    '/api/organizations/1/attendance-stats',
+]
+
+
+def worker(base_url, paths, deadline, results, lock, offset):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError):
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies, errors = results.setdefault(path, ([], [0]))
+            latencies.append(elapsed)
+            errors[0] += not ok
+
+
+def run(base_url, paths=None, concurrency=16, duration=10):
+    paths = paths or DEFAULT_PATHS
+    base_url = base_url.rstrip('/')
+    results, lock = {}, threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for n in range(concurrency):
+            pool.submit(worker, base_url, paths, deadline, results, lock, n)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'endpoints': {
+            path: {**summarize(latencies, elapsed), 'errors': errors[0]}
+            for path, (latencies, errors) in results.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base_url')
+    parser.add_argument('--path', action='append', dest='paths', help='path to request (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    args = parser.parse_args(argv)
+
+    report = run(args.base_url, args.paths, args.concurrency, args.duration)
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Fire parallel join_organization requests and check the memberships.
+
+Usage::
+
+    python -m bench.join_concurrency --threads 32
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.join_concurrency --reset
+
+Without DATABASE_URL a throwaway SQLite file is used. Checks that
+parallel joins of one user create exactly one membership, that parallel
+joins of different users all succeed, that a join costs one statement,
+and that renaming an organization moves its enroll code. Prints one line
+per check and exits non-zero if any fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_db_file = None
+if not os.environ.get('DATABASE_URL'):
+    _db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from sqlalchemy import event, func, select
+
+from app import create_app
+from bench import datagen
+from models import db, User, OrgMember
+
+app = create_app()
+
+
+def join_all(requests, threads):
+    barrier = threading.Barrier(threads)
+
+    def join(payload):
+        client = app.test_client()
+        try:
+            barrier.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        return client.post('/api/join-organization', json=payload).status_code
+
+    with ThreadPoolExecutor(threads) as pool:
+        return list(pool.map(join, requests))
+
+
+def members(org_id, user_id=None):
+    with app.app_context():
+        query = select(func.count()).select_from(OrgMember).where(OrgMember.org_id == org_id)
+        if user_id is not None:
+            query = query.where(OrgMember.user_id == user_id)
+        return db.session.scalar(query)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--reset', action='store_true',
+                        help='drop and recreate all tables (always done for the throwaway SQLite database)')
+    args = parser.parse_args(argv)
+
+    try:
+        with app.app_context():
+            if args.reset or _db_file is not None:
+                datagen.reset_database()
+            elif db.session.query(User).first() is not None:
+                parser.error('database is not empty, pass --reset to wipe it')
+            # Organisasi 2 tanpa anggota; user organisasi 1 yang akan bergabung
+            datagen.generate(orgs=2, members=args.threads, sessions=0, password_method='pbkdf2:sha256:1')
+            org_id = 2
+            code = 'DOJO2'
+            db.session.execute(OrgMember.__table__.delete().where(OrgMember.org_id == org_id))
+            db.session.commit()
+            engine = db.engine
+
+        user_ids = list(range(2, 2 + args.threads))
+        same_user = join_all([{'user_id': user_ids[0], 'enroll_code': code}] * args.threads, args.threads)
+        distinct = join_all([{'user_id': user_id, 'enroll_code': code} for user_id in user_ids[1:]], args.threads)
+        same_user_rows, total_rows = members(org_id, user_ids[0]), members(org_id)
+
+        statements = []
+        listener = lambda conn, cursor, statement, *rest: statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', listener)
+        single = app.test_client().post('/api/join-organization', json={'user_id': 1, 'enroll_code': code})
+        event.remove(engine, 'before_cursor_execute', listener)
+
+        client = app.test_client()
+        client.put('/api/organizations/%d' % org_id, json={'enroll_code': 'RENAMED'})
+        old_code = client.post('/api/join-organization', json={'user_id': 1, 'enroll_code': code}).status_code
+        new_code = client.post('/api/join-organization', json={'user_id': 1, 'enroll_code': 'RENAMED'}).status_code
+
+        checks = [
+            ('parallel joins of one user: one success', same_user.count(200) == 1),
+            ('parallel joins of one user: others rejected as duplicates', same_user.count(400) == args.threads - 1),
+            ('parallel joins of one user: one membership row', same_user_rows == 1),
+            ('parallel joins of different users all succeed', distinct.count(200) == len(distinct)),
+            ('one membership row per user', total_rows == args.threads),
+            ('join runs a single SQL statement', single.status_code == 200 and len(statements) == 1),
+            ('renamed enroll code: old code rejected', old_code == 404),
+            ('renamed enroll code: new code resolves', new_code == 400),
+        ]
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+    for name, ok in checks:
+        print('%-60s %s' % (name, 'ok' if ok else 'FAILED'))
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Login latency under concurrent load, inline hashing vs. the process pool.
+
+Usage::
+
+    python -m bench.login_latency --users 50 --concurrency 16 --requests 200
+
+Runs the same login storm twice against a throwaway SQLite database:
+once with ``PASSWORD_HASH_WORKERS=0`` (hashing in the request thread, the
+old behaviour) and once with the process pool, and prints p50/p95/p99
+latency for both as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from bench.stats import summarize
+from extensions import passwords
+from models import db, User
+
+app = create_app()
+
+
+def seed(n, method):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        pwhash = generate_password_hash('secret', method=method)
+        db.session.add_all(
+            User(name='user %d' % i, email='user%d@bench.local' % i, password=pwhash)
+            for i in range(n)
+        )
+        db.session.commit()
+
+
+def run(label, workers, args):
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    passwords.init_app(app)
+    seed(args.users, app.config['PASSWORD_HASH_METHOD'])
+
+    def login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/users/login', json={
+            'email': 'user%d@bench.local' % (i % args.users),
+            'password': 'secret',
+        })
+        assert response.status_code == 200, response.json
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = list(pool.map(login, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    passwords.shutdown()
+
+    return {'mode': label, 'workers': workers, **summarize(latencies, elapsed)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--method', default=None,
+                        help='override PASSWORD_HASH_METHOD, e.g. pbkdf2:sha256:100000')
+    args = parser.parse_args(argv)
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+
+    try:
+        results = [run('inline', 0, args), run('pool', args.workers, args)]
+    finally:
+        os.unlink(_db_file.name)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Check that every loading plan dumps its schema in a fixed number of queries.
+
+Usage::
+
+    python -m bench.query_budget --orgs 10 --members 100 --limit 200
+
+Seeds a throwaway SQLite database twice, once with a single small club
+and once at the given scale. For every plan in loading.py it loads up to
+``limit`` rows with ``load_plan`` and dumps them with the matching schema
+inside ``query_budget``. Exits non-zero if a plan goes over its budget or
+needs more queries on the larger dataset, otherwise prints the query
+counts as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+_db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from app import create_app
+from bench import datagen
+from loading import QueryBudgetExceeded, load_plan, query_budget
+from models import db
+from schema import (
+    UserLoginSchema, UserSchema, UserSummarySchema, OrganizationCreteSchema, OrganizationSchema,
+    OrganizationSummarySchema, AttendanceSessionSchema, AttendanceRecordSchema,
+)
+
+app = create_app()
+
+# (rencana, schema yang di-dump, batas query); batas dihitung dari jumlah
+# relasi yang dimuat rencana, bukan dari jumlah baris
+CASES = [
+    ('user', UserSchema, 7),
+    ('user_login', UserLoginSchema, 6),
+    ('user_summary', UserSummarySchema, 1),
+    ('organization', OrganizationSchema, 4),
+    ('organization_create', OrganizationCreteSchema, 1),
+    ('organization_summary', OrganizationSummarySchema, 1),
+    ('attendance_session', AttendanceSessionSchema, 1),
+    ('attendance_record', AttendanceRecordSchema, 1),
+]
+
+SMALL = {'orgs': 1, 'members': 3, 'sessions': 2, 'attendance': 1.0}
+
+
+def count_queries(limit):
+    counts, failures = {}, []
+    for plan, schema_class, budget in CASES:
+        schema = schema_class(many=True)
+        model = schema.opts.model
+        db.session.expunge_all()
+        try:
+            with query_budget(budget) as statements:
+                schema.dump(model.query.options(*load_plan(plan)).order_by(model.id).limit(limit).all())
+        except QueryBudgetExceeded as e:
+            failures.append('%s: %s' % (plan, str(e).splitlines()[0]))
+        counts[plan] = len(statements)
+    return counts, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--limit', type=int, default=200, help='rows per page, as in the list endpoints')
+    args = parser.parse_args(argv)
+
+    report = {}
+    with app.app_context():
+        datagen.reset_database()
+        datagen.generate(seed=args.seed, password_method='pbkdf2:sha256:1', **SMALL)
+        small, failures = count_queries(args.limit)
+
+        datagen.reset_database()
+        datagen.generate(args.orgs, args.members, args.sessions, args.attendance, args.seed, 'pbkdf2:sha256:1')
+        large, large_failures = count_queries(args.limit)
+        failures += large_failures
+
+    for plan, _, budget in CASES:
+        report[plan] = {'budget': budget, 'small': small[plan], 'large': large[plan]}
+        # Lebih banyak baris tidak boleh menambah query (N+1)
+        if large[plan] > small[plan]:
+            failures.append('%s: %d queries on the small dataset, %d on the large one'
+                            % (plan, small[plan], large[plan]))
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if failures:
+        print('\n'.join(failures), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        status = main()
+    finally:
+        os.unlink(_db_file.name)
+    sys.exit(status)
@@ -0,0 +1,105 @@
+"""Check that the attendance hot-path queries are served by an index.
+
+Usage::
+
+    python -m bench.query_plans                 # throwaway SQLite database
+    DATABASE_URL=postgresql://... python -m bench.query_plans
+
+Creates the schema from models.py (SQLite) or uses the migrated database
+at DATABASE_URL, runs EXPLAIN for each query and exits non-zero when a
+plan falls back to a full table scan.
+"""
+import os
+import sys
+import tempfile
+
+if not os.environ.get('DATABASE_URL'):
+    _db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from datetime import date
+
+from sqlalchemy import select, text
+
+from app import create_app
+from models import db, Organization, OrgMember, AttendanceSession, AttendanceRecord, SessionSchedule
+
+app = create_app()
+
+HOT_QUERIES = {
+    'join_organization: enroll code lookup':
+        select(Organization.id).where(Organization.enroll_code == 'abc'),
+    'join_organization: membership check':
+        select(OrgMember.id).where(OrgMember.org_id == 1, OrgMember.user_id == 1),
+    'user organizations':
+        select(OrgMember.org_id).where(OrgMember.user_id == 1),
+    'session records':
+        select(AttendanceRecord.id).where(AttendanceRecord.attendance_session_id == 1),
+    'session record for user':
+        select(AttendanceRecord.id).where(
+            AttendanceRecord.attendance_session_id == 1, AttendanceRecord.user_id == 1),
+    'user records':
+        select(AttendanceRecord.id).where(AttendanceRecord.user_id == 1),
+    'organization sessions by date':
+        select(AttendanceSession.id).where(
+            AttendanceSession.org_id == 1,
+            AttendanceSession.date.between(date(2024, 1, 1), date(2024, 1, 31))),
+    'organization calendar page':
+        select(AttendanceSession.id).where(
+            AttendanceSession.org_id == 1,
+            AttendanceSession.date.between(date(2024, 1, 1), date(2024, 1, 31)),
+            AttendanceSession.date > date(2024, 1, 10),
+        ).order_by(AttendanceSession.date, AttendanceSession.id).limit(51),
+    'schedule sessions':
+        select(AttendanceSession.id).where(AttendanceSession.schedule_id == 1),
+    'organization schedules':
+        select(SessionSchedule.id).where(SessionSchedule.org_id == 1),
+}
+
+
+def explain(conn, query):
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        return [row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+    if dialect == 'postgresql':
+        # Tabel kecil selalu di-seq-scan; paksa planner memilih index kalau ada
+        conn.execute(text('SET enable_seqscan = off'))
+    return [' '.join(str(col) for col in row) for row in conn.execute(text('EXPLAIN ' + sql))]
+
+
+def is_full_scan(dialect, plan):
+    for line in plan:
+        if dialect == 'sqlite' and line.startswith('SCAN ') and 'INDEX' not in line:
+            return True
+        if dialect == 'postgresql' and 'Seq Scan' in line:
+            return True
+        if dialect == 'mysql' and ' ALL ' in ' %s ' % line:
+            return True
+    return False
+
+
+def main():
+    failures = 0
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            db.create_all()
+        with db.engine.connect() as conn:
+            for name, query in HOT_QUERIES.items():
+                plan = explain(conn, query)
+                full_scan = is_full_scan(conn.dialect.name, plan)
+                failures += full_scan
+                print('%-4s %s' % ('FAIL' if full_scan else 'ok', name))
+                for line in plan:
+                    print('       ' + line)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    try:
+        status = main()
+    finally:
+        if '_db_file' in globals():
+            os.unlink(_db_file.name)
+    sys.exit(status)
@@ -0,0 +1,239 @@
+"""Drive every API route, /health and /metrics and write a JSON performance baseline.
+
+Usage::
+
+    python -m bench.run --orgs 10 --members 200 --iterations 30 --output baseline.json
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.run --reset
+    python -m bench.compare old.json new.json
+
+Without DATABASE_URL a throwaway SQLite file is used. The dataset comes
+from bench.datagen; each endpoint is then called ``iterations`` times
+through the Flask test client, recording latency and the number of SQL
+statements per request.
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+_db_file = None
+if not os.environ.get('DATABASE_URL'):
+    _db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from sqlalchemy import event
+
+from app import create_app
+from bench import datagen
+from bench.stats import summarize
+from models import db, User
+from purge import PENDING, RUNNING
+
+app = create_app()
+
+
+class Context:
+    """Ids shared between scenarios; write scenarios add what they create."""
+
+    def __init__(self, members):
+        self.members = members
+        self.token = None
+        self.registered = []
+        self.organizations = []
+        self.sessions = []
+        self.sync_token = None
+
+    def athlete(self, i):
+        # Athlete pertama organisasi 1 punya id 2 (id 1 adalah coach)
+        return 2 + i % self.members
+
+
+def _register(ctx, i):
+    return 'POST', '/api/users/register', {
+        'json': {'name': 'New %d' % i, 'email': 'new%d@bench.local' % i, 'password': datagen.PASSWORD}}
+
+
+def _login(ctx, i):
+    return 'POST', '/api/users/login', {
+        'json': {'email': 'athlete%d@bench.local' % ctx.athlete(i), 'password': datagen.PASSWORD}}
+
+
+def _auth(ctx):
+    return {'headers': {'Authorization': 'Bearer ' + ctx.token}}
+
+
+# (nama, fungsi yang membangun request, fungsi yang membaca response)
+SCENARIOS = [
+    ('POST /api/users/register', _register, lambda ctx, r: ctx.registered.append(r.json['data']['id'])),
+    ('POST /api/users/import', lambda ctx, i: ('POST', '/api/users/import?org_id=1', {'json': [
+        {'name': 'Imported %d-%d' % (i, n), 'email': 'import%d-%d@bench.local' % (i, n), 'password': datagen.PASSWORD}
+        for n in range(10)]}), None),
+    ('POST /api/users/login', _login, lambda ctx, r: setattr(ctx, 'token', r.json['token'])),
+    ('GET /api/users/me', lambda ctx, i: ('GET', '/api/users/me', _auth(ctx)), None),
+    ('GET /api/users', lambda ctx, i: ('GET', '/api/users', {}), None),
+    ('GET /api/users?fields=summary', lambda ctx, i: ('GET', '/api/users?fields=summary', {}), None),
+    ('GET /api/users/<id>', lambda ctx, i: ('GET', '/api/users/%d' % ctx.athlete(i), {}), None),
+    ('PUT /api/users/<id>', lambda ctx, i: ('PUT', '/api/users/%d' % ctx.registered[i], {'json': {'role': 'atlet'}}), None),
+    ('POST /api/organizations', lambda ctx, i: ('POST', '/api/organizations', {'json': {
+        'name': 'New dojo %d' % i, 'enroll_code': 'NEW%d' % i, 'user_id': ctx.registered[i]}}),
+        lambda ctx, r: ctx.organizations.append(r.json['data']['id'])),
+    ('GET /api/organizations', lambda ctx, i: ('GET', '/api/organizations', {}), None),
+    ('GET /api/organizations?fields=summary', lambda ctx, i: ('GET', '/api/organizations?fields=summary', {}), None),
+    ('GET /api/organizations/<id>', lambda ctx, i: ('GET', '/api/organizations/1', {}), None),
+    ('PUT /api/organizations/<id>', lambda ctx, i: ('PUT', '/api/organizations/%d' % ctx.organizations[i], {
+        'json': {'name': 'Renamed dojo %d' % i}}), None),
+    ('POST /api/organizations/<id>/schedules', lambda ctx, i: ('POST', '/api/organizations/%d/schedules' % ctx.organizations[i], {
+        'json': {'user_id': ctx.registered[i], 'weekdays': [0, 3], 'time_open': '19:00', 'time_close': '21:00',
+                 'start_date': date.today().isoformat(), 'end_date': (date.today() + timedelta(days=364)).isoformat()}}),
+        None),
+    ('GET /api/organizations/<id>/sessions', lambda ctx, i: ('GET', '/api/organizations/1/sessions?from=%s&to=%s' % (
+        date.today().replace(day=1).isoformat(), (date.today().replace(day=1) + timedelta(days=31)).isoformat()), {}),
+        None),
+    ('GET /api/organizations/<id>/attendance-stats', lambda ctx, i: ('GET', '/api/organizations/1/attendance-stats', {}), None),
+    ('GET /api/organizations/<id>/attendance-export', lambda ctx, i: ('GET', '/api/organizations/1/attendance-export', {}), None),
+    ('POST /api/join-organization', lambda ctx, i: ('POST', '/api/join-organization', {'json': {
+        'user_id': ctx.registered[i], 'enroll_code': 'DOJO1'}}), None),
+    ('POST /api/add-presences', lambda ctx, i: ('POST', '/api/add-presences', {'json': {
+        'user_id': 1, 'org_id': 1, 'date': date.today().isoformat(), 'time_open': '00:00:00', 'time_close': '23:59:59'}}),
+        lambda ctx, r: ctx.sessions.append(r.json['data']['id'])),
+    ('POST /api/presences', lambda ctx, i: ('POST', '/api/presences', {'json': {
+        'user_id': ctx.athlete(0), 'attendance_session_id': ctx.sessions[i], 'status': 'hadir'}}), None),
+    # Iterasi pertama menulis, sisanya dijawab dari penyimpanan Idempotency-Key
+    ('POST /api/presences (Idempotency-Key retry)', lambda ctx, i: ('POST', '/api/presences', {
+        'json': {'user_id': ctx.athlete(1), 'attendance_session_id': ctx.sessions[0], 'status': 'hadir'},
+        'headers': {'Idempotency-Key': 'bench-retry'}}), None),
+    ('POST /api/presences/batch', lambda ctx, i: ('POST', '/api/presences/batch', {'json': {
+        'attendance_session_id': ctx.sessions[i],
+        'records': [{'user_id': ctx.athlete(n), 'status': 'hadir'} for n in range(ctx.members)]}}), None),
+    ('GET /api/sync', lambda ctx, i: ('GET', '/api/sync', _auth(ctx)),
+        lambda ctx, r: setattr(ctx, 'sync_token', r.json['data']['token'])),
+    # Perubahan sejak sync sebelumnya saja; biayanya mengikuti jumlah perubahan
+    ('GET /api/sync?since=<token>', lambda ctx, i: ('GET', '/api/sync', dict(_auth(ctx), query_string={
+        'since': ctx.sync_token})), lambda ctx, r: setattr(ctx, 'sync_token', r.json['data']['token'])),
+    # Hanya snapshot awal; stream ditutup setelah event pertama, lihat _call
+    ('GET /api/attendance-sessions/<id>/stream', lambda ctx, i: (
+        'GET', '/api/attendance-sessions/%d/stream' % ctx.sessions[i], {}), None),
+    ('POST /api/sync (offline check-ins)', lambda ctx, i: ('POST', '/api/sync', dict(_auth(ctx), json={
+        'since': ctx.sync_token,
+        'checkins': [{'attendance_session_id': ctx.sessions[i], 'status': 'hadir'}]})), None),
+    ('DELETE /api/organizations/<id>', lambda ctx, i: ('DELETE', '/api/organizations/%d' % ctx.organizations[i], {}), None),
+    ('GET /api/organizations/<id>/deletion', lambda ctx, i: (
+        'GET', '/api/organizations/%d/deletion' % ctx.organizations[i], {}), None),
+    ('DELETE /api/users/<id>', lambda ctx, i: ('DELETE', '/api/users/%d' % ctx.registered[i], {}), None),
+    ('GET /api/users/<id>/deletion', lambda ctx, i: ('GET', '/api/users/%d/deletion' % ctx.registered[i], {}), None),
+    ('GET /health', lambda ctx, i: ('GET', '/health', {}), None),
+    ('GET /metrics', lambda ctx, i: ('GET', '/metrics', {}), None),
+]
+
+
+def _call(client, method, url, kwargs):
+    response = client.open(url, method=method, **kwargs)
+    if response.mimetype == 'text/event-stream':
+        # Stream SSE tidak pernah selesai; ukur sampai snapshot pertama terkirim
+        for chunk in response.response:
+            break
+        response.close()
+    else:
+        # Export dikirim sebagai stream; baca sampai habis supaya ikut terukur
+        response.get_data()
+    return response
+
+
+def run_scenarios(iterations, members):
+    client = app.test_client()
+    ctx = Context(members)
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    results = {}
+    try:
+        for name, build, after in SCENARIOS:
+            latencies, queries, errors = [], [], 0
+            for i in range(iterations):
+                method, url, kwargs = build(ctx, i)
+                del statements[:]
+                start = time.perf_counter()
+                response = _call(client, method, url, kwargs)
+                latencies.append(time.perf_counter() - start)
+                queries.append(len(statements))
+                if response.status_code >= 400:
+                    errors += 1
+                elif after is not None:
+                    after(ctx, response)
+            results[name] = {
+                **summarize(latencies),
+                'errors': errors,
+                'sql_queries_avg': round(sum(queries) / len(queries), 2),
+                'sql_queries_max': max(queries),
+            }
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    _wait_for_purges(client, ctx)
+    return results
+
+
+def _wait_for_purges(client, ctx, timeout=60):
+    # Purge berjalan di thread latar; tunggu selesai sebelum database dibuang
+    urls = ['/api/organizations/%d/deletion' % id for id in ctx.organizations]
+    urls += ['/api/users/%d/deletion' % id for id in ctx.registered]
+    deadline = time.monotonic() + timeout
+    while urls and time.monotonic() < deadline:
+        response = client.get(urls[0])
+        if response.status_code == 200 and response.json['data']['status'] in (PENDING, RUNNING):
+            time.sleep(0.1)
+        else:
+            urls.pop(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--reset', action='store_true',
+                        help='drop and recreate all tables (always done for the throwaway SQLite database)')
+    parser.add_argument('--output', help='write the JSON baseline to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    try:
+        with app.app_context():
+            if args.reset or _db_file is not None:
+                datagen.reset_database()
+            elif db.session.query(User).first() is not None:
+                parser.error('database is not empty, pass --reset to wipe it')
+            summary = datagen.generate(args.orgs, args.members, args.sessions, args.attendance, args.seed,
+                                       app.config.get('PASSWORD_HASH_METHOD'))
+            dialect = db.engine.dialect.name
+
+        baseline = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'database': dialect,
+                'iterations': args.iterations,
+                'dataset': summary,
+            },
+            'endpoints': run_scenarios(args.iterations, args.members),
+        }
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+    output = json.dumps(baseline, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
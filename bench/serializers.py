@@ -0,0 +1,96 @@
+"""Parity check and timing for the compiled list serializers.
+
+Usage::
+
+    python -m bench.serializers --orgs 10 --members 100 --repeat 5
+
+Seeds a throwaway SQLite database, then for every list schema compares
+``schema.dump`` on eagerly loaded ORM objects with the compiled
+serializer on Core rows. Exits non-zero if any output differs, otherwise
+prints the timings of both paths as JSON.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+_db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+os.environ['DATABASE_URL'] = 'sqlite:///' + _db_file.name
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from sqlalchemy import select
+
+from app import create_app
+from bench import datagen
+from loading import load_plan
+from models import db
+from schema import users_schema, users_summary_schema, organizations_schema, organizations_summary_schema
+from serializers import compile_schema
+
+app = create_app()
+
+CASES = [
+    ('users full', users_schema, 'user'),
+    ('users summary', users_summary_schema, 'user_summary'),
+    ('organizations full', organizations_schema, 'organization'),
+    ('organizations summary', organizations_summary_schema, 'organization_summary'),
+]
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    datagen.add_arguments(parser)
+    parser.add_argument('--limit', type=int, default=200, help='rows per page, as in the list endpoints')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    report, mismatches = {}, []
+    with app.app_context():
+        datagen.reset_database()
+        datagen.generate(args.orgs, args.members, args.sessions, args.attendance, args.seed, 'pbkdf2:sha256:1')
+
+        for name, schema, plan in CASES:
+            model = schema.opts.model
+            serializer = compile_schema(schema)
+
+            orm_time, expected = best_of(args.repeat, lambda: schema.dump(
+                model.query.options(*load_plan(plan)).order_by(model.id).limit(args.limit).all()))
+            compiled_time, actual = best_of(args.repeat, lambda: serializer.dump(
+                db.session.execute(select(model.__table__).order_by(model.id).limit(args.limit)).all()))
+
+            if expected != actual:
+                mismatches.append(name)
+            report[name] = {
+                'rows': len(actual),
+                'orm_schema_ms': round(orm_time * 1000, 2),
+                'compiled_ms': round(compiled_time * 1000, 2),
+                'speedup': round(orm_time / compiled_time, 2) if compiled_time else None,
+                'identical': expected == actual,
+            }
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if mismatches:
+        print('output differs for: ' + ', '.join(mismatches), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        status = main()
+    finally:
+        os.unlink(_db_file.name)
+    sys.exit(status)
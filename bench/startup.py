@@ -0,0 +1,111 @@
+"""Measure process startup: importing the app, create_app() and the first requests.
+
+Usage::
+
+    python -m bench.startup --runs 10 --output startup.json
+    DATABASE_URL=postgresql://localhost/dojo_bench python -m bench.startup --path /api/organizations/1
+
+Without DATABASE_URL a throwaway SQLite file is seeded by bench.datagen
+first. Every run is a fresh interpreter, so module imports, mapper
+configuration, schema construction and the first connection are all
+paid again, as in a new server worker. Prints (and optionally writes) the
+median and max of each phase in milliseconds.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PHASES = ('import', 'create_app', 'first_request', 'second_request')
+
+
+def child(path):
+    start = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    client = app.test_client()
+    status = client.get(path).status_code
+    first = time.perf_counter()
+    client.get(path)
+    second = time.perf_counter()
+    print(json.dumps({
+        'status': status,
+        'import': imported - start,
+        'create_app': created - imported,
+        'first_request': first - created,
+        'second_request': second - first,
+    }))
+
+
+def seed():
+    from app import create_app
+    from bench import datagen
+
+    with create_app().app_context():
+        datagen.reset_database()
+        datagen.generate(orgs=2, members=20, sessions=5, password_method='pbkdf2:sha256:1')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/users', help='route requested twice after startup')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.path)
+        return 0
+
+    env = dict(os.environ)
+    env.setdefault('SECRET_KEY', 'bench')
+    db_file = None
+    if not env.get('DATABASE_URL'):
+        db_file = tempfile.NamedTemporaryFile(suffix='.sqlite', delete=False)
+        env['DATABASE_URL'] = 'sqlite:///' + db_file.name
+        subprocess.run([sys.executable, '-c', 'from bench.startup import seed; seed()'], env=env, check=True)
+
+    try:
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, '-m', 'bench.startup', '--child', '--path', args.path],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+    finally:
+        if db_file is not None:
+            os.unlink(db_file.name)
+
+    statuses = sorted({run['status'] for run in runs})
+    report = {
+        'path': args.path,
+        'runs': args.runs,
+        'status': statuses,
+        'python': sys.version.split()[0],
+        'phases': {
+            phase: {
+                'median_ms': round(statistics.median(run[phase] for run in runs) * 1000, 1),
+                'max_ms': round(max(run[phase] for run in runs) * 1000, 1),
+            }
+            for phase in PHASES
+        },
+    }
+    report['total_median_ms'] = round(sum(phase['median_ms'] for phase in report['phases'].values()), 1)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0 if statuses == [200] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
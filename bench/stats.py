@@ -0,0 +1,21 @@
+"""Latency statistics shared by the benchmark scripts."""
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, elapsed=None):
+    """Summarize a list of latencies (seconds) into a JSON-friendly dict."""
+    if not latencies:
+        return {'requests': 0}
+    elapsed = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
@@ -0,0 +1,242 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request
+from sqlalchemy import event
+from werkzeug.utils import import_string
+
+from models import User, Organization, OrgMember, AttendanceSession, AttendanceRecord
+from routing import AppSession
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    This is also the interface a pluggable backend has to provide:
+    ``get``, ``set``, ``delete`` and ``clear``.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Model yang perubahannya mempengaruhi response user/organization
+_WATCHED = (User, Organization, OrgMember, AttendanceSession, AttendanceRecord)
+
+
+def _get(session, model, id, loaded):
+    # loaded menahan objek selama satu flush; identity map hanya memegang
+    # weak reference, jadi objek yang dimuat di sini bisa langsung hilang
+    key = (model, id)
+    if key not in loaded:
+        loaded[key] = session.get(model, id)
+    return loaded[key]
+
+
+def _org_owner(session, org_id, loaded):
+    org = _get(session, Organization, org_id, loaded)
+    if org is not None:
+        yield 'user', org.user_id
+
+
+def _affected(session, obj, loaded):
+    """Yield (namespace, id) entries whose cached response embeds ``obj``.
+
+    ``id`` is ``None`` when the whole namespace has to go, e.g. a user's
+    name appears in every organization they are a member of.
+    """
+    if isinstance(obj, User):
+        yield 'user', obj.id
+        yield 'organization', None
+    elif isinstance(obj, Organization):
+        yield 'organization', obj.id
+        yield 'user', obj.user_id
+    elif isinstance(obj, OrgMember):
+        yield 'organization', obj.org_id
+        yield 'user', obj.user_id
+    elif isinstance(obj, AttendanceSession):
+        yield 'organization', obj.org_id
+        yield 'user', obj.user_id
+        yield from _org_owner(session, obj.org_id, loaded)
+    elif isinstance(obj, AttendanceRecord):
+        yield 'user', obj.user_id
+        attendance_session = _get(session, AttendanceSession, obj.attendance_session_id, loaded)
+        if attendance_session is not None:
+            yield 'organization', attendance_session.org_id
+            yield 'user', attendance_session.user_id
+            yield from _org_owner(session, attendance_session.org_id, loaded)
+
+
+class ResponseCache:
+    """Read-through cache for JSON detail responses with ETag support.
+
+    Entries are keyed by ``namespace:id:variant`` and dropped after a
+    commit that touched any row embedded in them.
+
+    Configuration:
+
+    RESPONSE_CACHE_SIZE / RESPONSE_CACHE_TTL
+        Size and TTL (seconds) of the default in-process LRU.
+    RESPONSE_CACHE_BACKEND
+        Optional import path of a class with the ``LRUCache`` interface,
+        constructed with ``maxsize`` and ``ttl``.
+    """
+
+    variants = ('full', 'summary')
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_SIZE', 1024)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 60)
+        app.config.setdefault('RESPONSE_CACHE_BACKEND', None)
+
+        backend = app.config['RESPONSE_CACHE_BACKEND'] or LRUCache
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        self.backend = backend(maxsize=app.config['RESPONSE_CACHE_SIZE'], ttl=app.config['RESPONSE_CACHE_TTL'])
+        app.extensions['response_cache'] = self
+
+        if not event.contains(AppSession, 'after_flush', self._after_flush):
+            event.listen(AppSession, 'after_flush', self._after_flush)
+            event.listen(AppSession, 'do_orm_execute', self._do_orm_execute)
+            event.listen(AppSession, 'after_commit', self._after_commit)
+            event.listen(AppSession, 'after_rollback', self._after_rollback)
+
+    def _key(self, namespace, id, variant):
+        return '%s:%s:%s' % (namespace, id, variant)
+
+    def _bump_generation(self):
+        # Response yang dirender sebelum ini tidak akan disimpan
+        with self._generation_lock:
+            self._generation += 1
+
+    def clear(self):
+        self._bump_generation()
+        self.backend.clear()
+
+    def invalidate(self, namespace, id=None):
+        if id is None:
+            # Backend tidak wajib mendukung hapus per prefix, jadi
+            # invalidasi satu namespace mengosongkan semuanya
+            self.clear()
+        else:
+            self._bump_generation()
+            self.backend.delete(*(self._key(namespace, id, variant) for variant in self.variants))
+
+    def cached(self, namespace):
+        """Cache a detail view taking an ``id`` argument and serve 304s.
+
+        Only 200 responses are stored. The ``fields`` query parameter
+        selects the variant part of the key.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                variant = request.args.get('fields', 'full')
+                if variant not in self.variants:
+                    return f(*args, **kwargs)
+
+                key = self._key(namespace, kwargs['id'], variant)
+                entry = self.backend.get(key)
+                if entry is None:
+                    generation = self._generation
+                    response = current_app.make_response(f(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    entry = (hashlib.sha1(body).hexdigest(), body)
+                    # Jangan simpan hasil yang dibuat sebelum invalidasi terbaru
+                    if generation == self._generation:
+                        self.backend.set(key, entry)
+
+                etag, body = entry
+                if etag in request.if_none_match:
+                    response = current_app.response_class(status=304)
+                else:
+                    response = current_app.response_class(body, mimetype='application/json')
+                response.set_etag(etag)
+                return response
+            return decorated
+        return decorator
+
+    def invalidate_on_commit(self, session, objs=(), keys=()):
+        """Drop the entries embedding ``objs``, and the ``(namespace, id)`` ``keys``, when ``session`` commits.
+
+        For rows written with Core statements, which skip the flush. Pass
+        ``keys`` when there is no loaded instance to derive them from.
+        """
+        pending = session.info.setdefault('response_cache_pending', set())
+        pending.update(keys)
+        loaded = {}
+        with session.no_autoflush:
+            for obj in objs:
+                pending.update(_affected(session, obj, loaded))
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('response_cache_pending', set())
+        loaded = {}
+        with session.no_autoflush:
+            for obj in (*session.new, *session.dirty, *session.deleted):
+                if isinstance(obj, _WATCHED):
+                    pending.update(_affected(session, obj, loaded))
+
+    def _do_orm_execute(self, orm_execute_state):
+        # Bulk INSERT/UPDATE/DELETE tidak lewat flush, jadi tidak ada objek
+        # yang bisa diperiksa; buang semua entry saat commit
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, _WATCHED):
+            orm_execute_state.session.info['response_cache_clear'] = True
+
+    def _after_commit(self, session):
+        pending = session.info.pop('response_cache_pending', ())
+        if session.info.pop('response_cache_clear', False):
+            self.clear()
+            return
+        for namespace, id in pending:
+            self.invalidate(namespace, id)
+
+    def _after_rollback(self, session):
+        session.info.pop('response_cache_pending', None)
+        session.info.pop('response_cache_clear', None)
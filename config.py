@@ -0,0 +1,80 @@
+from os import cpu_count, getenv
+from dotenv import load_dotenv
+
+load_dotenv()
+class Config:
+    SECRET_KEY = getenv('SECRET_KEY')
+    SQLALCHEMY_DATABASE_URI = getenv('DATABASE_URL')
+    SQLALCHEMY_COMMIT_ON_TEARDOWN = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pool koneksi database, lihat pool.py
+    DB_POOL_SIZE = int(getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(getenv('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_STATEMENT_TIMEOUT = int(getenv('DB_STATEMENT_TIMEOUT', 0))
+    DB_POOL_WARMUP = int(getenv('DB_POOL_WARMUP', DB_POOL_SIZE))
+
+    # Replica baca untuk request GET (dipisah koma), lihat routing.py
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    READ_YOUR_WRITES_SECONDS = float(getenv('READ_YOUR_WRITES_SECONDS', 0))
+
+    # Masa berlaku token login (detik)
+    TOKEN_MAX_AGE = int(getenv('TOKEN_MAX_AGE', 60 * 60 * 24))
+
+    # Hashing password di process pool, lihat passwords.py
+    PASSWORD_HASH_METHOD = getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(getenv('PASSWORD_HASH_WORKERS', cpu_count() or 1))
+    PASSWORD_HASH_QUEUE = int(getenv('PASSWORD_HASH_QUEUE', 4 * (cpu_count() or 1)))
+    PASSWORD_HASH_TIMEOUT = float(getenv('PASSWORD_HASH_TIMEOUT', 5))
+    PASSWORD_HASH_RESULT_TIMEOUT = float(getenv('PASSWORD_HASH_RESULT_TIMEOUT', 30))
+
+    # Jumlah maksimum user per request /api/users/import
+    IMPORT_MAX_ROWS = int(getenv('IMPORT_MAX_ROWS', 2000))
+
+    # Panjang maksimum periode jadwal mingguan (hari), lihat schedules.py
+    SCHEDULE_MAX_DAYS = int(getenv('SCHEDULE_MAX_DAYS', 366))
+
+    # Sinkronisasi client offline /api/sync, lihat sync.py
+    SYNC_PAGE_SIZE = int(getenv('SYNC_PAGE_SIZE', 1000))
+    SYNC_OVERLAP_SECONDS = float(getenv('SYNC_OVERLAP_SECONDS', 5))
+    SYNC_TOMBSTONE_DAYS = int(getenv('SYNC_TOMBSTONE_DAYS', 30))
+    SYNC_UPLOAD_MAX_ROWS = int(getenv('SYNC_UPLOAD_MAX_ROWS', 500))
+    SYNC_MAX_OFFLINE_DAYS = float(getenv('SYNC_MAX_OFFLINE_DAYS', 7))
+
+    # Cache response detail user/organization, lihat cache.py
+    RESPONSE_CACHE_SIZE = int(getenv('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_TTL = int(getenv('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_BACKEND = getenv('RESPONSE_CACHE_BACKEND')
+
+    # Penyimpanan response POST per Idempotency-Key, lihat idempotency.py
+    IDEMPOTENCY_TTL = int(getenv('IDEMPOTENCY_TTL', 60 * 60 * 24))
+    IDEMPOTENCY_SIZE = int(getenv('IDEMPOTENCY_SIZE', 10000))
+    IDEMPOTENCY_BACKEND = getenv('IDEMPOTENCY_BACKEND')
+    IDEMPOTENCY_PENDING_TIMEOUT = float(getenv('IDEMPOTENCY_PENDING_TIMEOUT', 60))
+
+    # Stream SSE presensi per sesi, lihat feed.py
+    ATTENDANCE_FEED_BROKER = getenv('ATTENDANCE_FEED_BROKER')
+    ATTENDANCE_FEED_QUEUE_SIZE = int(getenv('ATTENDANCE_FEED_QUEUE_SIZE', 100))
+    ATTENDANCE_FEED_HEARTBEAT = float(getenv('ATTENDANCE_FEED_HEARTBEAT', 15))
+
+    # Buka/tutup sesi presensi otomatis, lihat scheduler.py
+    SCHEDULER_ENABLED = getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_RETRY_SECONDS = float(getenv('SCHEDULER_RETRY_SECONDS', 5))
+
+    # Peta enroll code -> org_id di memori, dimuat ulang tiap TTL (detik)
+    ENROLL_CODE_TTL = int(getenv('ENROLL_CODE_TTL', 300))
+
+    # Penghapusan bertahap user/organization yang di-soft delete, lihat purge.py
+    PURGE_BATCH_SIZE = int(getenv('PURGE_BATCH_SIZE', 500))
+    PURGE_BATCH_PAUSE = float(getenv('PURGE_BATCH_PAUSE', 0.05))
+    PURGE_RETRY_SECONDS = float(getenv('PURGE_RETRY_SECONDS', 30))
+    PURGE_CLAIM_SECONDS = float(getenv('PURGE_CLAIM_SECONDS', 300))
+
+    # Metrics Prometheus di /metrics dan header Server-Timing
+    METRICS_ENABLED = getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # URL database untuk asgi.py; default diturunkan dari DATABASE_URL
+    ASYNC_DATABASE_URL = getenv('ASYNC_DATABASE_URL')
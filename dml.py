@@ -0,0 +1,76 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# Dialect yang punya INSERT ... ON CONFLICT / ON DUPLICATE KEY di bawah
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite', 'mysql', 'mariadb')
+
+
+def check_dialect(dialect_name):
+    """Raise ``RuntimeError`` unless the helpers below support ``dialect_name``.
+
+    join_organization and every attendance record write depend on them,
+    so ``DatabasePool.setup_engine`` checks this when the app starts
+    rather than failing on the first request.
+    """
+    if dialect_name not in SUPPORTED_DIALECTS:
+        raise RuntimeError('database dialect %r is not supported; use one of: %s'
+                           % (dialect_name, ', '.join(SUPPORTED_DIALECTS)))
+
+
+def insert_ignore(model, dialect_name, index_elements):
+    """Return an INSERT for ``model``'s table that skips rows violating a unique constraint.
+
+    ``index_elements`` names the columns of that constraint (needed by
+    PostgreSQL and SQLite). The result's ``rowcount`` is the number of
+    rows actually inserted.
+    """
+    table = model.__table__
+    if dialect_name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect_name == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect_name in ('mysql', 'mariadb'):
+        return insert(table).prefix_with('IGNORE')
+    raise NotImplementedError('insert_ignore does not support %s' % dialect_name)
+
+
+def upsert(model, dialect_name, index_elements, columns):
+    """Return an INSERT that overwrites ``columns`` of the existing row on a unique conflict.
+
+    ``updated_at`` of a ``Tracked`` model is overwritten as well: the
+    conflict update does not run the column's ``onupdate``.
+    """
+    table = model.__table__
+    if 'updated_at' in table.c:
+        columns = [*columns, 'updated_at']
+    if dialect_name in ('postgresql', 'sqlite'):
+        dialect = postgresql if dialect_name == 'postgresql' else sqlite
+        stmt = dialect.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: stmt.excluded[column] for column in columns},
+        )
+    if dialect_name in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in columns})
+    raise NotImplementedError('upsert does not support %s' % dialect_name)
+
+
+def upsert_increment(model, dialect_name, index_elements, column):
+    """Return an INSERT that adds to ``column`` of the existing row on a unique conflict.
+
+    Executed with a list of rows this is a single executemany; the value
+    given for ``column`` may be negative to decrement.
+    """
+    table = model.__table__
+    if dialect_name in ('postgresql', 'sqlite'):
+        dialect = postgresql if dialect_name == 'postgresql' else sqlite
+        stmt = dialect.insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: table.c[column] + stmt.excluded[column]},
+        )
+    if dialect_name in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column]})
+    raise NotImplementedError('upsert_increment does not support %s' % dialect_name)
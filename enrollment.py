@@ -0,0 +1,94 @@
+import threading
+import time
+
+from sqlalchemy import event, inspect, select
+
+from models import db, Organization
+from routing import AppSession
+
+
+class EnrollCodeIndex:
+    """In-memory ``enroll_code -> org_id`` map for join_organization.
+
+    Loaded at startup and kept current after every commit that creates,
+    renames or (soft) deletes an organization through the ORM. Codes missing
+    from the map are looked up once (another process may have created
+    them), and the whole map is reloaded every ENROLL_CODE_TTL seconds
+    to pick up changes made by other processes.
+    """
+
+    def __init__(self, app=None):
+        self._codes = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ENROLL_CODE_TTL', 300)
+        self.ttl = app.config['ENROLL_CODE_TTL']
+        app.extensions['enroll_code_index'] = self
+
+        if not event.contains(AppSession, 'after_flush', self._after_flush):
+            event.listen(AppSession, 'after_flush', self._after_flush)
+            event.listen(AppSession, 'after_commit', self._after_commit)
+            event.listen(AppSession, 'after_rollback', self._after_rollback)
+
+        with app.app_context():
+            try:
+                self.load()
+            except Exception as e:
+                # Tabel belum ada (mis. saat `flask db upgrade`); dimuat saat lookup pertama
+                db.session.rollback()
+                app.logger.warning('enroll code index not loaded: %s', getattr(e, 'orig', e))
+
+    def load(self):
+        codes = dict(db.session.execute(select(Organization.enroll_code, Organization.id)).all())
+        with self._lock:
+            self._codes = codes
+            self._loaded_at = time.monotonic()
+
+    def lookup(self, enroll_code):
+        """Return the org_id for ``enroll_code``, or None if no organization uses it."""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.load()
+        org_id = self._codes.get(enroll_code)
+        if org_id is None:
+            org_id = db.session.scalar(select(Organization.id).where(Organization.enroll_code == enroll_code))
+            if org_id is not None:
+                with self._lock:
+                    self._codes[enroll_code] = org_id
+        return org_id
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('enroll_code_pending', [])
+        for obj in session.new:
+            if isinstance(obj, Organization):
+                pending.append((None, obj.enroll_code, obj.id))
+        for obj in session.dirty:
+            if not isinstance(obj, Organization):
+                continue
+            if obj.deleted_at is not None:
+                pending.append((obj.enroll_code, None, obj.id))
+                continue
+            history = inspect(obj).attrs.enroll_code.history
+            if history.has_changes():
+                for old in history.deleted:
+                    pending.append((old, obj.enroll_code, obj.id))
+        for obj in session.deleted:
+            if isinstance(obj, Organization):
+                pending.append((obj.enroll_code, None, obj.id))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('enroll_code_pending', ())
+        if not pending:
+            return
+        with self._lock:
+            for old, new, org_id in pending:
+                if old is not None and self._codes.get(old) == org_id:
+                    del self._codes[old]
+                if new is not None:
+                    self._codes[new] = org_id
+
+    def _after_rollback(self, session):
+        session.info.pop('enroll_code_pending', None)
@@ -0,0 +1,33 @@
+"""Extension instances shared by the blueprints.
+
+They are created here without an app and bound to one by ``create_app``
+in app.py, so views can import them (and decorate with
+``response_cache.cached``) before any app exists. ``db`` lives in
+models.py and ``ma`` in schema.py, next to the classes built on them.
+"""
+from flask_cors import CORS
+
+from cache import ResponseCache
+from enrollment import EnrollCodeIndex
+from feed import AttendanceFeed
+from idempotency import IdempotencyKeys
+from metrics import Metrics
+from passwords import PasswordHasher
+from pool import DatabasePool
+from purge import PurgeQueue
+from routing import ReadReplicas
+from scheduler import SessionScheduler
+from summaries import AttendanceSummaries
+
+cors = CORS()
+metrics = Metrics()
+database_pool = DatabasePool()
+read_replicas = ReadReplicas()
+passwords = PasswordHasher()
+response_cache = ResponseCache()
+idempotency_keys = IdempotencyKeys()
+attendance_feed = AttendanceFeed()
+session_scheduler = SessionScheduler()
+enroll_codes = EnrollCodeIndex()
+purge_queue = PurgeQueue()
+attendance_summaries = AttendanceSummaries()
@@ -0,0 +1,188 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+from flask import Response
+from sqlalchemy import event, inspect
+from werkzeug.utils import import_string
+
+from models import AttendanceSession, AttendanceRecord
+from routing import AppSession
+
+
+class Subscription:
+    """Bounded queue of ``(event, data)`` messages for one listener."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Listener terlalu lambat: buang antrean dan minta client
+            # mengambil ulang datanya lewat endpoint biasa
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(('reset', {}))
+
+    def get(self, timeout=None):
+        """Return the next message, or None after ``timeout`` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Pub/sub between threads of one process.
+
+    This is also the interface a pluggable broker has to provide:
+    ``publish(channel, event, data)`` and ``subscribe(channel)``
+    returning an object with ``get(timeout)`` and ``close()``. With
+    several server processes, use a broker backed by e.g. Redis so
+    every process sees every message.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put((event, data))
+
+
+def session_channel(attendance_session_id):
+    return 'attendance_session:%s' % attendance_session_id
+
+
+def record_payload(record):
+    return {
+        'id': record.id,
+        'attendance_session_id': record.attendance_session_id,
+        'user_id': record.user_id,
+        'status': record.status,
+    }
+
+
+def _format(event, data):
+    return 'event: %s\ndata: %s\n\n' % (event, json.dumps(data))
+
+
+def _status_changed(obj):
+    return inspect(obj).attrs.status.history.has_changes()
+
+
+class AttendanceFeed:
+    """Push attendance changes to Server-Sent Events listeners.
+
+    After a commit, every inserted ``AttendanceRecord``, every record
+    whose status changed and every ``AttendanceSession`` whose status
+    changed is published on the session's channel.
+
+    Configuration:
+
+    ATTENDANCE_FEED_BROKER
+        Optional import path of a class with the ``InProcessBroker``
+        interface, constructed with ``queue_size``.
+    ATTENDANCE_FEED_QUEUE_SIZE
+        Messages buffered per listener before it is told to ``reset``.
+    ATTENDANCE_FEED_HEARTBEAT
+        Seconds between keep-alive comments on an idle stream.
+    """
+
+    def __init__(self, app=None):
+        self.broker = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ATTENDANCE_FEED_BROKER', None)
+        app.config.setdefault('ATTENDANCE_FEED_QUEUE_SIZE', 100)
+        app.config.setdefault('ATTENDANCE_FEED_HEARTBEAT', 15)
+
+        broker = app.config['ATTENDANCE_FEED_BROKER'] or InProcessBroker
+        if isinstance(broker, str):
+            broker = import_string(broker)
+        self.broker = broker(queue_size=app.config['ATTENDANCE_FEED_QUEUE_SIZE'])
+        self.heartbeat = app.config['ATTENDANCE_FEED_HEARTBEAT']
+        app.extensions['attendance_feed'] = self
+
+        if not event.contains(AppSession, 'after_flush', self._after_flush):
+            event.listen(AppSession, 'after_flush', self._after_flush)
+            event.listen(AppSession, 'after_commit', self._after_commit)
+            event.listen(AppSession, 'after_rollback', self._after_rollback)
+
+    def publish(self, attendance_session_id, event, data):
+        self.broker.publish(session_channel(attendance_session_id), event, data)
+
+    def subscribe(self, attendance_session_id):
+        return self.broker.subscribe(session_channel(attendance_session_id))
+
+    def publish_on_commit(self, session, attendance_session_id, event, data):
+        """Publish an event when ``session`` commits, for rows written with Core statements."""
+        session.info.setdefault('attendance_feed_pending', []).append((attendance_session_id, event, data))
+
+    def stream(self, subscription, initial=()):
+        """Return an SSE response sending ``initial`` events, then ``subscription``.
+
+        Subscribe before reading the data for ``initial`` so that no
+        change committed in between is lost.
+        """
+        def generate():
+            try:
+                for message in initial:
+                    yield _format(*message)
+                while True:
+                    message = subscription.get(timeout=self.heartbeat)
+                    # Komentar keep-alive juga mendeteksi client yang sudah putus
+                    yield ': keep-alive\n\n' if message is None else _format(*message)
+            finally:
+                subscription.close()
+
+        return Response(generate(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('attendance_feed_pending', [])
+        for obj in session.new:
+            if isinstance(obj, AttendanceRecord):
+                pending.append((obj.attendance_session_id, 'record', record_payload(obj)))
+        for obj in session.dirty:
+            if isinstance(obj, AttendanceRecord) and _status_changed(obj):
+                pending.append((obj.attendance_session_id, 'record', record_payload(obj)))
+            elif isinstance(obj, AttendanceSession) and _status_changed(obj):
+                pending.append((obj.id, 'session', {'id': obj.id, 'status': obj.status}))
+
+    def _after_commit(self, session):
+        for attendance_session_id, name, data in session.info.pop('attendance_feed_pending', ()):
+            self.publish(attendance_session_id, name, data)
+
+    def _after_rollback(self, session):
+        session.info.pop('attendance_feed_pending', None)
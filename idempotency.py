@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+import time
+
+from flask import g, request
+from werkzeug.utils import import_string
+
+from cache import LRUCache
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Header response yang ikut disimpan dan dikirim ulang saat replay
+STORED_HEADERS = ('Content-Type', 'Location')
+
+
+class IdempotencyKeys:
+    """Replay the stored response of a POST retried with the same ``Idempotency-Key``.
+
+    The first request with a key reserves it, runs normally and its
+    response (status, body and STORED_HEADERS) is kept for
+    IDEMPOTENCY_TTL seconds, keyed by method, path and key. A retry with
+    the same key and body gets that response back with an
+    ``Idempotent-Replayed: true`` header without running the view again.
+    A retry arriving while the first is still running gets a 409, one
+    with a different body a 422. 5xx responses are not stored, so the
+    request can be retried for real.
+
+    The store defaults to an in-process ``LRUCache`` of IDEMPOTENCY_SIZE
+    entries; IDEMPOTENCY_BACKEND takes the same kind of import path as
+    RESPONSE_CACHE_BACKEND. Reservations are atomic only within one
+    process. A reservation whose request died without answering expires
+    after IDEMPOTENCY_PENDING_TIMEOUT seconds.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('IDEMPOTENCY_TTL', 24 * 60 * 60)
+        app.config.setdefault('IDEMPOTENCY_SIZE', 10000)
+        app.config.setdefault('IDEMPOTENCY_BACKEND', None)
+        app.config.setdefault('IDEMPOTENCY_PENDING_TIMEOUT', 60)
+
+        backend = app.config['IDEMPOTENCY_BACKEND'] or LRUCache
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        self.backend = backend(maxsize=app.config['IDEMPOTENCY_SIZE'], ttl=app.config['IDEMPOTENCY_TTL'])
+        self.pending_timeout = app.config['IDEMPOTENCY_PENDING_TIMEOUT']
+        app.extensions['idempotency_keys'] = self
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def reserve(self, method, path, key, body):
+        """Claim ``key`` for this request.
+
+        Returns ``(store_key, fingerprint, None)`` when the caller should
+        run the request and then ``store`` or ``release`` it, or
+        ``(None, None, (status, body, headers))`` with the response to
+        send instead.
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            return None, None, _error('%s must be at most %d characters' % (HEADER, MAX_KEY_LENGTH), 400)
+
+        store_key = 'idempotency:%s:%s:%s' % (method, path, key)
+        fingerprint = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            entry = self.backend.get(store_key)
+            if entry is None or (entry[1] is None and time.time() - entry[2] > self.pending_timeout):
+                # (fingerprint, status, waktu mulai) selama request masih berjalan
+                self.backend.set(store_key, (fingerprint, None, time.time()))
+                return store_key, fingerprint, None
+
+        stored_fingerprint, status, *rest = entry
+        if stored_fingerprint != fingerprint:
+            return None, None, _error('%s was already used with a different request' % HEADER, 422)
+        if status is None:
+            return None, None, _error('a request with this %s is still being processed' % HEADER, 409)
+        body, headers = rest
+        return None, None, (status, body, dict(headers, **{'Idempotent-Replayed': 'true'}))
+
+    def store(self, store_key, fingerprint, status, body, headers):
+        if status >= 500:
+            self.release(store_key)
+            return
+        headers = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        self.backend.set(store_key, (fingerprint, status, body, headers))
+
+    def release(self, store_key):
+        self.backend.delete(store_key)
+
+    def _before_request(self):
+        key = request.headers.get(HEADER)
+        if request.method != 'POST' or not key:
+            return None
+        store_key, fingerprint, response = self.reserve(request.method, request.path, key, request.get_data())
+        if response is not None:
+            status, body, headers = response
+            return body, status, headers
+        g._idempotency = (store_key, fingerprint)
+        return None
+
+    def _after_request(self, response):
+        reserved = g.pop('_idempotency', None)
+        if reserved is not None:
+            self.store(*reserved, response.status_code, response.get_data(), response.headers)
+        return response
+
+    def _teardown_request(self, exc):
+        # Request gagal sebelum after_request: lepas reservasinya
+        reserved = g.pop('_idempotency', None)
+        if reserved is not None:
+            self.release(reserved[0])
+
+
+def _error(message, status):
+    # Tanpa jsonify supaya bisa dipakai di luar app context (asgi.py)
+    return status, json.dumps({'status': 'error', 'message': message}).encode(), {'Content-Type': 'application/json'}
@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, User, Organization, OrgMember, AttendanceSession, AttendanceRecord
+
+# Rencana eager loading per schema di schema.py. Setiap rencana harus
+# mengikuti relasi yang di-dump oleh schema, supaya serialisasi tidak
+# memicu lazy load (N+1) untuk setiap baris.
+
+
+def _session_options(path):
+    # AttendanceSessionSchema: created_by(name), organization(name)
+    return path.options(
+        joinedload(AttendanceSession.created_by),
+        joinedload(AttendanceSession.organization),
+    )
+
+
+def _record_options(path):
+    # AttendanceRecordSchema: user(name, email), attendance_session(date, time)
+    return path.options(
+        joinedload(AttendanceRecord.user),
+        joinedload(AttendanceRecord.attendance_session),
+    )
+
+
+def _organization_options(path, include_member=True):
+    # OrganizationSchema: member, attendance_sessions, created_by, attendance_records
+    options = [
+        _session_options(path.selectinload(Organization.attendance_sessions)),
+        path.joinedload(Organization.created_by),
+        _record_options(path.selectinload(Organization.attendance_records)),
+    ]
+    if include_member:
+        options.append(path.selectinload(Organization.member).joinedload(OrgMember.user))
+    return options
+
+
+def _user_plan():
+    # UserSchema: organizations (tanpa member), org_members, attendance_sessions, attendance_records
+    return [
+        *_organization_options(selectinload(User.organizations), include_member=False),
+        selectinload(User.org_members).joinedload(OrgMember.user),
+        _session_options(selectinload(User.attendance_sessions)),
+        _record_options(selectinload(User.attendance_records)),
+    ]
+
+
+def _user_login_plan():
+    # UserLoginSchema: organizations (lengkap), org_members
+    return [
+        *_organization_options(selectinload(User.organizations)),
+        selectinload(User.org_members).joinedload(OrgMember.user),
+    ]
+
+
+def _organization_plan():
+    # OrganizationSchema di level paling atas
+    return [
+        selectinload(Organization.member).joinedload(OrgMember.user),
+        _session_options(selectinload(Organization.attendance_sessions)),
+        joinedload(Organization.created_by),
+        _record_options(selectinload(Organization.attendance_records)),
+    ]
+
+
+def _organization_create_plan():
+    # OrganizationCreteSchema: created_by
+    return [joinedload(Organization.created_by)]
+
+
+_PLANS = {
+    'user': _user_plan,
+    'user_login': _user_login_plan,
+    'user_summary': list,
+    'organization': _organization_plan,
+    'organization_create': _organization_create_plan,
+    'organization_summary': list,
+    'attendance_session': lambda: [
+        joinedload(AttendanceSession.created_by),
+        joinedload(AttendanceSession.organization),
+    ],
+    'attendance_record': lambda: [
+        joinedload(AttendanceRecord.user),
+        joinedload(AttendanceRecord.attendance_session),
+    ],
+}
+
+
+def load_plan(name):
+    """Return the loader options matching the schema called ``name``.
+
+    Use with ``Model.query.options(*load_plan('user'))`` before dumping
+    with the corresponding schema.
+    """
+    return _PLANS[name]()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(limit, engine=None):
+    """Fail when the wrapped block runs more than ``limit`` SQL statements.
+
+    Meant for tests::
+
+        with app.app_context(), query_budget(10):
+            client.get('/api/organizations/1')
+
+    Yields the list of executed statements so callers can inspect them.
+    """
+    engine = engine or db.engine
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    if len(statements) > limit:
+        raise QueryBudgetExceeded(
+            '%d queries executed, budget was %d:\n%s'
+            % (len(statements), limit, '\n'.join(statements))
+        )
@@ -0,0 +1,185 @@
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Bagian waktu yang dicatat per request: nama metric dan nama di Server-Timing
+PHASES = {
+    'db': 'dojo_db_duration_seconds',
+    'serialize': 'dojo_serialize_duration_seconds',
+    'password_hash': 'dojo_password_hash_duration_seconds',
+}
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label tuple."""
+
+    def __init__(self, name, help, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s histogram' % self.name]
+        with self._lock:
+            series = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = ','.join('%s="%s"' % (k, v.replace('"', '\\"')) for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append('%s_bucket{%s,le="%s"} %d' % (self.name, labels, bound, cumulative))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (self.name, labels, count))
+            lines.append('%s_sum{%s} %.6f' % (self.name, labels, total))
+            lines.append('%s_count{%s} %d' % (self.name, labels, count))
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s counter' % self.name]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = ','.join('%s="%s"' % (k, v) for k, v in zip(self.labels, label_values))
+            lines.append('%s{%s} %d' % (self.name, labels, value))
+        return lines
+
+
+def _request_metrics():
+    if has_request_context():
+        return g.get('_metrics')
+    return None
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to ``phase`` of the current request.
+
+    Nested blocks of the same phase (e.g. a schema dumping a nested
+    schema) are only counted once. Outside a request this does nothing.
+    """
+    current = _request_metrics()
+    if current is None or phase in current['active']:
+        yield
+        return
+
+    current['active'].add(phase)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        current[phase] += perf_counter() - start
+        current['active'].discard(phase)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Disimpan di execution context, bukan di koneksi: statement yang gagal
+    # tidak sampai ke after_cursor_execute dan tidak meninggalkan sisa
+    if context is not None:
+        context._metrics_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    if start is None:
+        return
+    current = _request_metrics()
+    if current is not None:
+        current['db'] += perf_counter() - start
+        current['queries'] += 1
+
+
+class Metrics:
+    """Per-route request, SQL, serialization and hashing metrics.
+
+    Exposes Prometheus text on ``/metrics`` and adds a ``Server-Timing``
+    header to every response. Set METRICS_ENABLED to False to turn it off.
+    """
+
+    def __init__(self, app=None):
+        self.request_duration = Histogram(
+            'dojo_request_duration_seconds', 'Time spent handling a request.', ('method', 'route'))
+        self.phase_duration = {
+            phase: Histogram(name, 'Time per request spent in %s.' % phase, ('method', 'route'))
+            for phase, name in PHASES.items()
+        }
+        self.queries = Counter('dojo_db_queries_total', 'SQL statements executed.', ('method', 'route'))
+        self.responses = Counter('dojo_responses_total', 'Responses sent.', ('method', 'route', 'status'))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+        app.extensions['metrics'] = self
+
+    def _before_request(self):
+        g._metrics = dict({phase: 0.0 for phase in PHASES}, queries=0, active=set(), start=perf_counter())
+
+    def _after_request(self, response):
+        current = g.pop('_metrics', None)
+        if current is None:
+            return response
+
+        total = perf_counter() - current['start']
+        labels = (request.method, request.url_rule.rule if request.url_rule else 'unmatched')
+        self.request_duration.observe(labels, total)
+        for phase in PHASES:
+            self.phase_duration[phase].observe(labels, current[phase])
+        self.queries.inc(labels, current['queries'])
+        self.responses.inc(labels + (str(response.status_code),))
+
+        timings = ['%s;dur=%.2f' % (phase, current[phase] * 1000) for phase in PHASES if current[phase]]
+        timings.append('total;dur=%.2f' % (total * 1000))
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def export(self):
+        lines = self.request_duration.expose()
+        for histogram in self.phase_duration.values():
+            lines.extend(histogram.expose())
+        lines.extend(self.queries.expose())
+        lines.extend(self.responses.expose())
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
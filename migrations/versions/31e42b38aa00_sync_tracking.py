@@ -0,0 +1,76 @@
+"""Add updated_at to synced tables and sync_tombstones for /api/sync
+
+Revision ID: 31e42b38aa00
+Revises: a835d4314ba4
+Create Date: 2026-10-18 13:06:55.032502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '31e42b38aa00'
+down_revision = 'a835d4314ba4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Baris lama mendapat waktu migrasi, jadi sinkronisasi pertama mengirim semuanya
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_sync_tombstones_org_id_deleted_at', ['org_id', 'deleted_at'], unique=False)
+
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+        batch_op.create_index('ix_attendance_records_updated_at', ['updated_at'], unique=False)
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+        batch_op.create_index('ix_attendance_sessions_org_id_updated_at', ['org_id', 'updated_at'], unique=False)
+
+    with op.batch_alter_table('org_members', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+        batch_op.create_index('ix_org_members_org_id_updated_at', ['org_id', 'updated_at'], unique=False)
+
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+        batch_op.create_index('ix_users_updated_at', ['updated_at'], unique=False)
+
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('org_members', schema=None) as batch_op:
+        batch_op.drop_index('ix_org_members_org_id_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_sessions_org_id_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_records_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('sync_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_sync_tombstones_org_id_deleted_at')
+
+    op.drop_table('sync_tombstones')
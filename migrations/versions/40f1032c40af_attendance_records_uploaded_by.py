@@ -0,0 +1,28 @@
+"""Add attendance_records.uploaded_by for offline check-ins
+
+Revision ID: 40f1032c40af
+Revises: 31e42b38aa00
+Create Date: 2026-10-18 13:23:41.355345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '40f1032c40af'
+down_revision = '31e42b38aa00'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('uploaded_by', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_attendance_records_uploaded_by', 'users', ['uploaded_by'], ['id'], ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_attendance_records_uploaded_by', type_='foreignkey')
+        batch_op.drop_column('uploaded_by')
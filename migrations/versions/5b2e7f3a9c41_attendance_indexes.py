@@ -0,0 +1,73 @@
+"""Sync attendance sessions with models, add hot-path indexes
+
+Revision ID: 5b2e7f3a9c41
+Revises: c84f4d9d5e79
+Create Date: 2026-10-18 09:12:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e7f3a9c41'
+down_revision = 'c84f4d9d5e79'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # attendance_sessions.time dipecah jadi time_open/time_close, plus status
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='open'))
+        batch_op.add_column(sa.Column('time_open', sa.Time(), nullable=True))
+        batch_op.add_column(sa.Column('time_close', sa.Time(), nullable=True))
+
+    op.execute('UPDATE attendance_sessions SET time_open = time, time_close = time')
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.alter_column('time_open', existing_type=sa.Time(), nullable=False)
+        batch_op.alter_column('time_close', existing_type=sa.Time(), nullable=False)
+        batch_op.drop_column('time')
+        batch_op.create_index('ix_attendance_sessions_org_id_date', ['org_id', 'date'], unique=False)
+
+    # Hapus duplikat sebelum membuat unique constraint, simpan baris tertua
+    op.execute(
+        'DELETE FROM org_members WHERE id NOT IN '
+        '(SELECT id FROM (SELECT MIN(id) AS id FROM org_members GROUP BY org_id, user_id) AS keep)'
+    )
+    op.execute(
+        'DELETE FROM attendance_records WHERE id NOT IN '
+        '(SELECT id FROM (SELECT MIN(id) AS id FROM attendance_records '
+        'GROUP BY attendance_session_id, user_id) AS keep)'
+    )
+
+    with op.batch_alter_table('org_members', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_org_members_org_id_user_id', ['org_id', 'user_id'])
+        batch_op.create_index('ix_org_members_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_attendance_records_session_id_user_id', ['attendance_session_id', 'user_id'])
+        batch_op.create_index('ix_attendance_records_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_records_user_id')
+        batch_op.drop_constraint('uq_attendance_records_session_id_user_id', type_='unique')
+
+    with op.batch_alter_table('org_members', schema=None) as batch_op:
+        batch_op.drop_index('ix_org_members_user_id')
+        batch_op.drop_constraint('uq_org_members_org_id_user_id', type_='unique')
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_sessions_org_id_date')
+        batch_op.add_column(sa.Column('time', sa.Time(), nullable=True))
+
+    op.execute('UPDATE attendance_sessions SET time = time_open')
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.alter_column('time', existing_type=sa.Time(), nullable=False)
+        batch_op.drop_column('time_close')
+        batch_op.drop_column('time_open')
+        batch_op.drop_column('status')
@@ -0,0 +1,32 @@
+"""Add purge_claims so only one process purges a deleted row
+
+Revision ID: 7c2d9e4f1a36
+Revises: 40f1032c40af
+Create Date: 2026-10-18 14:02:11.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d9e4f1a36'
+down_revision = '40f1032c40af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('purge_claims',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('claimed_by', sa.String(length=64), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'row_id', name='uq_purge_claims_kind_row_id')
+    )
+
+
+def downgrade():
+    op.drop_table('purge_claims')
@@ -0,0 +1,51 @@
+"""Add session_schedules and attendance_sessions.schedule_id
+
+Revision ID: a835d4314ba4
+Revises: e41a7c9d5f23
+Create Date: 2026-10-18 13:01:31.460486
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a835d4314ba4'
+down_revision = 'e41a7c9d5f23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('session_schedules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('time_open', sa.Time(), nullable=False),
+    sa.Column('time_close', sa.Time(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('session_schedules', schema=None) as batch_op:
+        batch_op.create_index('ix_session_schedules_org_id', ['org_id'], unique=False)
+
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('schedule_id', sa.Integer(), nullable=True))
+        batch_op.create_unique_constraint('uq_attendance_sessions_schedule_id_date', ['schedule_id', 'date'])
+        batch_op.create_foreign_key('fk_attendance_sessions_schedule_id', 'session_schedules', ['schedule_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_sessions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_attendance_sessions_schedule_id', type_='foreignkey')
+        batch_op.drop_constraint('uq_attendance_sessions_schedule_id_date', type_='unique')
+        batch_op.drop_column('schedule_id')
+
+    with op.batch_alter_table('session_schedules', schema=None) as batch_op:
+        batch_op.drop_index('ix_session_schedules_org_id')
+
+    op.drop_table('session_schedules')
@@ -0,0 +1,41 @@
+"""Add attendance_summaries counters per user, organization and month
+
+Revision ID: e41a7c9d5f23
+Revises: 8d3c1f6b2a47
+Create Date: 2026-10-18 13:40:27.661094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41a7c9d5f23'
+down_revision = '8d3c1f6b2a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Isi awal tabel dengan `flask backfill-attendance-summary`
+    op.create_table('attendance_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'org_id', 'month', 'status', name='uq_attendance_summaries_user_id_org_id_month_status')
+    )
+    with op.batch_alter_table('attendance_summaries', schema=None) as batch_op:
+        batch_op.create_index('ix_attendance_summaries_org_id_month', ['org_id', 'month'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attendance_summaries', schema=None) as batch_op:
+        batch_op.drop_index('ix_attendance_summaries_org_id_month')
+
+    op.drop_table('attendance_summaries')
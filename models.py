@@ -1,10 +1,56 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class SoftDelete:
+    """Rows are marked with ``deleted_at`` and removed later by purge.py.
+
+    ORM queries (including relationship loads) skip marked rows unless
+    run with ``execution_options(include_deleted=True)``. Core queries
+    on the table see every row.
+    """
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Tracked:
+    """``updated_at`` is set by every INSERT and UPDATE, through the ORM or Core.
+
+    sync.py sends clients only the rows changed since their last sync.
+    Statements that bypass SQLAlchemy must set it themselves.
+    """
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow,
+                           server_default=db.func.current_timestamp())
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _skip_deleted(orm_execute_state):
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.execution_options.get('include_deleted', False)
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(
+            with_loader_criteria(SoftDelete, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
 
-db = SQLAlchemy()
 
 # Model User
-class User(db.Model):
+class User(SoftDelete, Tracked, db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -15,10 +61,11 @@ class User(db.Model):
     organizations = db.relationship('Organization', backref='created_by', lazy=True)    
     org_members = db.relationship('OrgMember', backref='user', lazy=True)
     attendance_sessions = db.relationship('AttendanceSession', backref='created_by', lazy=True)
-    attendance_records = db.relationship('AttendanceRecord', backref='user', lazy=True)
+    attendance_records = db.relationship('AttendanceRecord', backref='user', lazy=True,
+                                         foreign_keys='AttendanceRecord.user_id')
 
 # Model Organization
-class Organization(db.Model):
+class Organization(SoftDelete, Tracked, db.Model):
     __tablename__ = 'organizations'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -39,8 +86,13 @@ class Organization(db.Model):
 
     
 # Model OrgMember
-class OrgMember(db.Model):
+class OrgMember(Tracked, db.Model):
     __tablename__ = 'org_members'
+    __table_args__ = (
+        db.UniqueConstraint('org_id', 'user_id', name='uq_org_members_org_id_user_id'),
+        db.Index('ix_org_members_user_id', 'user_id'),
+        db.Index('ix_org_members_org_id_updated_at', 'org_id', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=False)
@@ -48,8 +100,14 @@ class OrgMember(db.Model):
     
 
 # Model AttendanceSession
-class AttendanceSession(db.Model):
+class AttendanceSession(Tracked, db.Model):
     __tablename__ = 'attendance_sessions'
+    __table_args__ = (
+        db.Index('ix_attendance_sessions_org_id_date', 'org_id', 'date'),
+        db.Index('ix_attendance_sessions_org_id_updated_at', 'org_id', 'updated_at'),
+        # Satu sesi per tanggal untuk setiap jadwal, jadi generate ulang tidak menggandakan sesi
+        db.UniqueConstraint('schedule_id', 'date', name='uq_attendance_sessions_schedule_id_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False)
@@ -58,15 +116,91 @@ class AttendanceSession(db.Model):
     time_close = db.Column(db.Time, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     org_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey('session_schedules.id', name='fk_attendance_sessions_schedule_id'), nullable=True)
 
     attendance_records = db.relationship('AttendanceRecord', backref='attendance_session', lazy=True)
+
+
+# Model SessionSchedule: jadwal latihan mingguan yang membuat AttendanceSession
+# untuk setiap tanggalnya dalam satu periode sekaligus (schedules.py)
+class SessionSchedule(db.Model):
+    __tablename__ = 'session_schedules'
+    __table_args__ = (
+        db.Index('ix_session_schedules_org_id', 'org_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    org_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Senin ... 6 = Minggu
+    time_open = db.Column(db.Time, nullable=False)
+    time_close = db.Column(db.Time, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
     
 
 # Model AttendanceRecord
-class AttendanceRecord(db.Model):
+class AttendanceRecord(Tracked, db.Model):
     __tablename__ = 'attendance_records'
+    __table_args__ = (
+        db.UniqueConstraint('attendance_session_id', 'user_id', name='uq_attendance_records_session_id_user_id'),
+        db.Index('ix_attendance_records_user_id', 'user_id'),
+        db.Index('ix_attendance_records_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     attendance_session_id = db.Column(db.Integer, db.ForeignKey('attendance_sessions.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(db.String(20), nullable=False) 
+    # User yang mengunggah presensi ini lewat /api/sync (sync.py); NULL untuk
+    # presensi dari endpoint lain, yang tidak boleh ditimpa unggahan offline
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id', name='fk_attendance_records_uploaded_by',
+                                                       ondelete='SET NULL'), nullable=True)
+
+
+# Model AttendanceSummary: jumlah presensi per user, organisasi, bulan dan
+# status, diperbarui dalam transaksi yang sama dengan presensinya (summaries.py)
+class AttendanceSummary(db.Model):
+    __tablename__ = 'attendance_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'org_id', 'month', 'status',
+                            name='uq_attendance_summaries_user_id_org_id_month_status'),
+        db.Index('ix_attendance_summaries_org_id_month', 'org_id', 'month'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    org_id = db.Column(db.Integer, db.ForeignKey('organizations.id'), nullable=False)
+    month = db.Column(db.Integer, nullable=False)  # YYYYMM
+    status = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Model SyncTombstone: baris yang dihapus permanen (purge.py), supaya
+# /api/sync tetap bisa memberi tahu client yang belum sinkron (sync.py)
+class SyncTombstone(db.Model):
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_org_id_deleted_at', 'org_id', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    org_id = db.Column(db.Integer, nullable=False)  # tanpa foreign key: organisasinya bisa sudah dihapus
+    deleted_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+# Model PurgeClaim: proses yang sedang menjalankan purge satu user atau
+# organization (purge.py), supaya worker lain tidak menjalankan purge yang sama
+class PurgeClaim(db.Model):
+    __tablename__ = 'purge_claims'
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'row_id', name='uq_purge_claims_kind_row_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)  # tanpa foreign key: barisnya dihapus oleh purge
+    claimed_by = db.Column(db.String(64), nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=False, default=utcnow)
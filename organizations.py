@@ -0,0 +1,411 @@
+import csv
+import json
+from datetime import date, datetime, time, timezone
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+
+import schema
+from extensions import response_cache, session_scheduler
+from loading import load_plan
+from models import db, User, Organization, OrgMember, AttendanceSession, AttendanceRecord, SessionSchedule
+from reports import attendance_stats, attendance_stats_queries, session_date_filters
+from schedules import generate_sessions
+from summaries import organization_summary, organization_summary_query
+from views import (
+    compiled_schema, date_id_cursor, format_date_id_cursor, paginate_by_id, parse_date_range, parse_page_args,
+    purge_progress, purge_started,
+)
+
+bp = Blueprint('organizations', __name__)
+
+ORGANIZATION_LIST_SCHEMAS = {
+    'full': 'organizations_schema',
+    'summary': 'organizations_summary_schema',
+}
+
+# Endpoint menambahkan organisasi
+@bp.route('/api/organizations', methods=['POST'])
+def create_organization():
+    data = request.get_json()
+    name = data.get('name')
+    enroll_code = data.get('enroll_code')
+    user_id = data.get('user_id')
+
+    if Organization.query.filter_by(name=name).first():
+        return jsonify({
+            'status': 'conflict',
+            'message': 'Organization already exists'
+        }), 409
+
+    try:
+        user = User.query.get_or_404(user_id)
+        user.role = 'pelatih'
+        db.session.commit()
+
+        organization = Organization(name=name, enroll_code=enroll_code, user_id=user_id)
+        db.session.add(organization)
+        db.session.flush() 
+
+        new_member = OrgMember(org_id=organization.id, user_id=user_id)
+        db.session.add(new_member)
+
+        db.session.commit()
+
+        result = schema.organization_create_schema.dump(organization)
+        return jsonify({    
+            'status': 'success',
+            'data': result,
+            'message': 'Organization created successfully'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+    
+# Endpoint menampilkan semua data Organization
+@bp.route('/api/organizations', methods=['GET'])
+def get_organizations():
+    variant = request.args.get('fields', 'full')
+    if variant not in ORGANIZATION_LIST_SCHEMAS:
+        return jsonify({
+            'status': 'error',
+            'message': 'fields must be one of: ' + ', '.join(ORGANIZATION_LIST_SCHEMAS)
+        }), 400
+
+    try:
+        limit, cursor = parse_page_args()
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    org, next_cursor = paginate_by_id(Organization, limit, cursor)
+    if not org:
+        return jsonify({
+            'status': 'not found',
+            'message': 'organization not found',
+            'data': [],
+            'next_cursor': None
+        })
+    
+    result = compiled_schema(ORGANIZATION_LIST_SCHEMAS[variant]).dump(org)
+    return jsonify({
+        'status': 'success',
+        'data': result,
+        'next_cursor': next_cursor,
+        'message': 'organizations found'
+    })
+
+# Endpoint menampilkan satu data Organization berdasarkan ID
+@bp.route('/api/organizations/<int:id>', methods=['GET'])
+@response_cache.cached('organization')
+def get_organization(id):
+    try:
+        org = Organization.query.options(*load_plan('organization')).get_or_404(id)
+        result = schema.organization_schema.dump(org)
+        result['attendance_summary'] = organization_summary(db.session.execute(organization_summary_query(id)).all())
+        return jsonify({
+            'status': 'success',
+            'data': result,
+            'message': 'organization found'
+        }), 200
+    
+    except Exception as e:
+        return jsonify({    
+            'status': 'error',
+            'message': str(e)
+        }), 404
+
+# Endpoint update data Organization berdasarkan ID
+@bp.route('/api/organizations/<int:id>', methods=['PUT'])
+def update_organization(id):
+    org = Organization.query.get_or_404(id)
+    data = request.get_json()
+
+    for field in ['name', 'enroll_code', 'created_by']:
+        if field in data:
+            setattr(org, field, data[field])
+
+    db.session.commit()
+    org = Organization.query.options(*load_plan('organization')).get(id)
+    result = schema.organization_schema.dump(org)
+
+    return jsonify({
+        'status': 'success',
+        'data': result,
+        'message': 'organization updated successfully'
+    })
+
+# Endpoint menghapus data Organization berdasarkan id
+@bp.route('/api/organizations/<int:id>', methods=['DELETE'])
+def delete_organization(id):
+    org = Organization.query.get_or_404(id)
+
+    org.deleted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.session.commit()
+
+    return purge_started('organization', id, 'organization deleted, related data is being removed')
+
+
+# Endpoint progres penghapusan organization oleh purge job
+@bp.route('/api/organizations/<int:id>/deletion', methods=['GET'])
+def get_organization_deletion(id):
+    return purge_progress('organization', id)
+
+
+# Endpoint statistik presensi Organization, dihitung dengan GROUP BY di database
+@bp.route('/api/organizations/<int:id>/attendance-stats', methods=['GET'])
+def get_attendance_stats(id):
+    try:
+        start, end = parse_date_range()
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if not db.session.get(Organization, id):
+        return jsonify({
+            'status': 'error',
+            'message': 'organization not found'
+        }), 404
+
+    member_query, session_query = attendance_stats_queries(id, start, end)
+
+    return jsonify({
+        'status': 'success',
+        'data': attendance_stats(id, start, end, db.session.execute(member_query), db.session.execute(session_query)),
+        'message': 'attendance stats found'
+    }), 200
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+EXPORT_COLUMNS = ('record_id', 'attendance_session_id', 'date', 'time_open', 'time_close', 'user_id', 'name', 'email', 'status')
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# Endpoint export presensi Organization (CSV/NDJSON), dikirim bertahap per baris
+@bp.route('/api/organizations/<int:id>/attendance-export', methods=['GET'])
+def export_attendance(id):
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': 'format must be one of: ' + ', '.join(EXPORT_FORMATS)
+        }), 400
+
+    try:
+        start, end = parse_date_range()
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if not db.session.get(Organization, id):
+        return jsonify({
+            'status': 'error',
+            'message': 'organization not found'
+        }), 404
+
+    query = select(
+        AttendanceRecord.id, AttendanceSession.id, AttendanceSession.date,
+        AttendanceSession.time_open, AttendanceSession.time_close,
+        User.id, User.name, User.email, AttendanceRecord.status,
+    ).select_from(AttendanceSession).join(AttendanceSession.attendance_records).join(AttendanceRecord.user).where(
+        *session_date_filters(id, start, end)
+    ).order_by(AttendanceSession.date, AttendanceSession.id, AttendanceRecord.id).execution_options(yield_per=1000)
+
+    def generate():
+        # yield_per memakai server-side cursor, jadi baris diambil per batch
+        rows = db.session.execute(query)
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            yield writer.writerow(EXPORT_COLUMNS)
+            for row in rows:
+                yield writer.writerow(row)
+        else:
+            for row in rows:
+                yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=lambda value: value.isoformat()) + '\n'
+
+    filename = 'attendance-%d.%s' % (id, export_format)
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': 'attachment; filename=' + filename},
+    )
+
+
+# Endpoint jadwal latihan mingguan: satu jadwal per hari, lalu sesi presensi
+# untuk seluruh periode dibuat sekaligus dengan satu INSERT
+@bp.route('/api/organizations/<int:id>/schedules', methods=['POST'])
+def create_schedules(id):
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    weekdays = data.get('weekdays')
+
+    try:
+        start_date = date.fromisoformat(data.get('start_date'))
+        end_date = date.fromisoformat(data.get('end_date'))
+        time_open = time.fromisoformat(data.get('time_open'))
+        time_close = time.fromisoformat(data.get('time_close'))
+    except (TypeError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': 'start_date, end_date (YYYY-MM-DD), time_open and time_close (HH:MM[:SS]) are required'
+        }), 400
+
+    if not isinstance(weekdays, list) or not weekdays or not all(
+        isinstance(day, int) and 0 <= day <= 6 for day in weekdays
+    ):
+        return jsonify({
+            'status': 'error',
+            'message': 'weekdays must be a non-empty list of days from 0 (Monday) to 6 (Sunday)'
+        }), 400
+
+    max_days = current_app.config['SCHEDULE_MAX_DAYS']
+    if start_date > end_date or (end_date - start_date).days >= max_days:
+        return jsonify({
+            'status': 'error',
+            'message': 'end_date must be on or after start_date and within %d days of it' % max_days
+        }), 400
+
+    # Sesi latihan tidak melewati tengah malam
+    if time_open >= time_close:
+        return jsonify({
+            'status': 'error',
+            'message': 'time_open must be before time_close'
+        }), 400
+
+    if not isinstance(user_id, int):
+        return jsonify({
+            'status': 'error',
+            'message': 'user_id is required'
+        }), 400
+
+    org = db.session.get(Organization, id)
+    if not org:
+        return jsonify({
+            'status': 'error',
+            'message': 'organization not found'
+        }), 404
+
+    is_member = db.session.scalar(
+        select(OrgMember.id).join(User, User.id == OrgMember.user_id)
+        .where(OrgMember.org_id == id, OrgMember.user_id == user_id)
+    )
+    if not is_member and org.user_id != user_id:
+        return jsonify({
+            'status': 'error',
+            'message': 'user_id must be a member of the organization'
+        }), 400
+
+    # Jadwal yang sama dikirim dua kali akan menggandakan setiap sesinya,
+    # jadi tolak jadwal yang bertumpuk di hari, periode dan jam yang sama
+    overlapping = db.session.scalars(
+        select(SessionSchedule).where(
+            SessionSchedule.org_id == id,
+            SessionSchedule.weekday.in_(weekdays),
+            SessionSchedule.start_date <= end_date,
+            SessionSchedule.end_date >= start_date,
+            SessionSchedule.time_open < time_close,
+            SessionSchedule.time_close > time_open,
+        ).order_by(SessionSchedule.id)
+    ).all()
+    if overlapping:
+        return jsonify({
+            'status': 'error',
+            'data': schema.session_schedules_schema.dump(overlapping),
+            'message': 'schedules overlap existing schedules of this organization'
+        }), 409
+
+    schedules = [
+        SessionSchedule(org_id=id, user_id=user_id, weekday=weekday, time_open=time_open, time_close=time_close,
+                        start_date=start_date, end_date=end_date)
+        for weekday in sorted(set(weekdays))
+    ]
+    try:
+        db.session.add_all(schedules)
+        db.session.flush()
+        sessions = generate_sessions(schedules)
+        # INSERT Core tidak lewat flush; beri tahu scheduler dan cache secara langsung
+        session_scheduler.track_on_commit(db.session, sessions)
+        response_cache.invalidate_on_commit(db.session, [org])
+        db.session.commit()
+    except IntegrityError:
+        # Jadwal atau anggota berubah oleh request lain saat menyimpan
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': 'schedules could not be saved, please retry'
+        }), 409
+
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'schedules': schema.session_schedules_schema.dump(schedules),
+            'sessions_created': len(sessions),
+        },
+        'message': 'schedules created successfully'
+    }), 201
+
+
+# Endpoint kalender sesi presensi Organization per rentang tanggal: range scan
+# index (org_id, date) dengan paginasi keyset pada (date, id)
+@bp.route('/api/organizations/<int:id>/sessions', methods=['GET'])
+def get_sessions(id):
+    try:
+        start, end = parse_date_range()
+        limit, cursor = parse_page_args(parse_cursor=date_id_cursor)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if not db.session.get(Organization, id):
+        return jsonify({
+            'status': 'error',
+            'message': 'organization not found'
+        }), 404
+
+    query = select(AttendanceSession.__table__).where(*session_date_filters(id, start, end))
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        query = query.where(or_(
+            AttendanceSession.date > cursor_date,
+            and_(AttendanceSession.date == cursor_date, AttendanceSession.id > cursor_id),
+        ))
+    rows = db.session.execute(query.order_by(AttendanceSession.date, AttendanceSession.id).limit(limit + 1)).all()
+    next_cursor = format_date_id_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    if not rows:
+        return jsonify({
+            'status': 'not found',
+            'message': 'attendance session not found',
+            'data': [],
+            'next_cursor': None
+        })
+
+    return jsonify({
+        'status': 'success',
+        'data': compiled_schema('attendance_sessions_summary_schema').dump(rows[:limit]),
+        'next_cursor': next_cursor,
+        'message': 'attendance sessions found'
+    })
@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from metrics import timed
+
+
+# Jumlah password per job hash_many; job kecil supaya hash dari register
+# dan login tidak lama menunggu di belakang import
+HASH_MANY_CHUNK_SIZE = 4
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue is full, or a hash does not finish, within the timeouts."""
+
+
+# Fungsi level modul supaya bisa di-pickle ke worker process
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _hash_chunk(passwords, method):
+    return [generate_password_hash(password, method=method) for password in passwords]
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+class PasswordHasher:
+    """Run password hashing in a bounded process pool.
+
+    Configuration (read from ``app.config``):
+
+    PASSWORD_HASH_METHOD
+        werkzeug method string including its cost, e.g.
+        ``pbkdf2:sha256:600000`` or ``scrypt:32768:8:1``. Stored hashes
+        whose prefix differs are rehashed on the next successful login.
+    PASSWORD_HASH_WORKERS
+        Number of worker processes. ``0`` hashes inline in the request
+        thread (useful for development and tests).
+    PASSWORD_HASH_QUEUE
+        Maximum number of hashes queued or running at once.
+    PASSWORD_HASH_TIMEOUT
+        Seconds to wait for a queue slot before raising
+        ``PasswordServiceBusy``.
+    PASSWORD_HASH_RESULT_TIMEOUT
+        Seconds to wait for a queued hash to finish before raising
+        ``PasswordServiceBusy``.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = os.cpu_count() or 1
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', workers)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', workers * 4)
+        app.config.setdefault('PASSWORD_HASH_TIMEOUT', 5)
+        app.config.setdefault('PASSWORD_HASH_RESULT_TIMEOUT', 30)
+
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self._prefix = None
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self.result_timeout = app.config['PASSWORD_HASH_RESULT_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_QUEUE'])
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Dibuat saat pertama dipakai, supaya setiap worker server
+        # (mis. gunicorn yang fork) punya pool sendiri
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordServiceBusy('password hashing queue is full')
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.result_timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordServiceBusy('password hashing did not finish in time')
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._result(self._submit(fn, *args))
+
+    def hash(self, password):
+        with timed('password_hash'):
+            return self._run(_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """Hash a list of passwords across all workers, e.g. for a bulk import.
+
+        Passwords go out in jobs of HASH_MANY_CHUNK_SIZE, each taking its
+        own queue slot, with at most one job per worker in flight. A
+        single hash from register or login therefore waits behind at
+        most one small job per worker, not the whole import.
+        """
+        with timed('password_hash'):
+            if not self.workers:
+                return _hash_chunk(passwords, self.method)
+
+            results = []
+            in_flight = deque()
+            try:
+                for start in range(0, len(passwords), HASH_MANY_CHUNK_SIZE):
+                    if len(in_flight) >= self.workers:
+                        results += self._result(in_flight.popleft())
+                    in_flight.append(self._submit(_hash_chunk, passwords[start:start + HASH_MANY_CHUNK_SIZE],
+                                                  self.method))
+                while in_flight:
+                    results += self._result(in_flight.popleft())
+            finally:
+                for future in in_flight:
+                    future.cancel()
+            return results
+
+    def verify(self, pwhash, password):
+        with timed('password_hash'):
+            return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        if self._prefix is None:
+            # werkzeug menyimpan method lengkap dengan parameter default
+            # (mis. 'scrypt' -> 'scrypt:32768:8:1'); ambil dari hash contoh.
+            # Dihitung saat login pertama, bukan di init_app, supaya start
+            # app tidak menunggu satu hash penuh
+            self._prefix = self._run(_hash, '', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
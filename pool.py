@@ -0,0 +1,153 @@
+import os
+import time
+
+from flask import jsonify
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+from dml import check_dialect
+from models import db
+
+# Perintah per koneksi untuk batas waktu statement (milidetik)
+STATEMENT_TIMEOUT_SQL = {
+    'postgresql': 'SET statement_timeout = %d',
+    'mysql': 'SET SESSION max_execution_time = %d',
+}
+
+
+def _is_memory_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+class DatabasePool:
+    """Connection pool settings, warm-up and a ``/health`` endpoint.
+
+    Configuration (read from ``app.config``):
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+        Passed to ``create_engine`` as ``pool_size``, ``max_overflow``,
+        ``pool_timeout`` (seconds), ``pool_recycle`` (seconds, ``-1``
+        never) and ``pool_pre_ping``.
+    DB_STATEMENT_TIMEOUT
+        Per-statement limit in milliseconds on PostgreSQL and MySQL,
+        ``0`` for no limit.
+    DB_POOL_WARMUP
+        Number of connections opened by ``warm_up()`` at startup.
+
+    Must be initialised before ``db.init_app(app)`` because the engine
+    is created there. Values already present in
+    ``SQLALCHEMY_ENGINE_OPTIONS`` win.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if 'sqlalchemy' in app.extensions:
+            raise RuntimeError('DatabasePool must be initialised before db.init_app(app)')
+
+        app.config.setdefault('DB_POOL_SIZE', 5)
+        app.config.setdefault('DB_MAX_OVERFLOW', 10)
+        app.config.setdefault('DB_POOL_TIMEOUT', 30)
+        app.config.setdefault('DB_POOL_RECYCLE', -1)
+        app.config.setdefault('DB_POOL_PRE_PING', False)
+        app.config.setdefault('DB_STATEMENT_TIMEOUT', 0)
+        app.config.setdefault('DB_POOL_WARMUP', 0)
+
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_pre_ping', app.config['DB_POOL_PRE_PING'])
+        options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+        # SQLite in-memory memakai StaticPool yang tidak punya ukuran pool
+        if not _is_memory_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+            options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+            options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+            options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+
+        self.statement_timeout = app.config['DB_STATEMENT_TIMEOUT']
+        self.warmup = app.config['DB_POOL_WARMUP']
+        app.add_url_rule('/health', 'health', self.health)
+        app.extensions['database_pool'] = self
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        sql = STATEMENT_TIMEOUT_SQL.get(self._dialect)
+        if sql is None or not self.statement_timeout:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(sql % self.statement_timeout)
+        finally:
+            cursor.close()
+
+    def setup_engine(self, app):
+        """Attach per-connection settings and fork safety to the app's engine,
+        then warm the pool. Call once after ``db.init_app(app)``.
+
+        Raises ``RuntimeError`` for a database dialect dml.py does not support.
+        """
+        with app.app_context():
+            engine = db.engine
+        self._dialect = engine.dialect.name
+        check_dialect(self._dialect)
+        event.listen(engine, 'connect', self._on_connect)
+        # Koneksi tidak boleh dipakai bersama oleh proses hasil fork
+        # (mis. gunicorn --preload); child membuka koneksinya sendiri
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+        self.warm_up(app)
+
+    def warm_up(self, app):
+        """Open ``DB_POOL_WARMUP`` connections so the first burst of requests reuses them."""
+        if not self.warmup:
+            return
+        with app.app_context():
+            connections = []
+            try:
+                for _ in range(self.warmup):
+                    connections.append(db.engine.connect())
+            except Exception as e:
+                # Database belum siap (mis. saat `flask db upgrade`); pool akan terisi saat dipakai
+                app.logger.warning('pool warm-up stopped after %d connections: %s', len(connections), e)
+            finally:
+                for connection in connections:
+                    connection.close()
+
+    def pool_stats(self):
+        pool = db.engine.pool
+        stats = {'class': type(pool).__name__}
+        # StaticPool/NullPool tidak punya ukuran maupun overflow
+        if hasattr(pool, 'checkedout'):
+            stats.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                # QueuePool menghitung overflow mulai dari -size
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+            })
+        return stats
+
+    def health(self):
+        start = time.perf_counter()
+        try:
+            # Langsung ke engine primary: lewat db.session, GET ini dirutekan ke replica
+            with db.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception as e:
+            return jsonify({
+                'status': 'error',
+                'data': {'pool': self.pool_stats()},
+                'message': 'database unavailable: ' + str(e),
+            }), 503
+        latency = time.perf_counter() - start
+
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'database': db.engine.dialect.name,
+                'latency_ms': round(latency * 1000, 3),
+                'pool': self.pool_stats(),
+            },
+            'message': 'ok',
+        }), 200
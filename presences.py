@@ -0,0 +1,295 @@
+from collections import Counter
+from datetime import date, time
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
+
+import schema
+from dml import insert_ignore, upsert
+from extensions import attendance_feed, enroll_codes, response_cache, session_scheduler
+from feed import record_payload
+from models import db, OrgMember, AttendanceSession, AttendanceRecord
+from scheduler import OPEN, initial_status
+from summaries import apply_deltas
+
+bp = Blueprint('presences', __name__)
+
+# Endpoint gabung Organization dan User
+@bp.route('/api/join-organization', methods=['POST'])
+def join_organization():
+    data = request.json
+    
+    user_id = data.get('user_id')  
+    enroll_code = data.get('enroll_code')
+    
+    if not user_id or not enroll_code:
+        return jsonify({'error': 'User ID and enroll code are required.'}), 400
+
+    try:
+        org_id = enroll_codes.lookup(enroll_code)
+        if org_id is None:
+            return jsonify({'error': 'Invalid enroll code.'}), 404
+
+        # Satu INSERT; duplikat ditolak oleh unique constraint (org_id, user_id),
+        # jadi join yang bersamaan tidak bisa membuat keanggotaan ganda
+        result = db.session.execute(
+            insert_ignore(OrgMember, db.engine.dialect.name, ['org_id', 'user_id']),
+            {'org_id': org_id, 'user_id': user_id},
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            return jsonify({'error': 'User is already a member of this organization.'}), 400
+
+        response_cache.invalidate_on_commit(db.session, keys=[('organization', org_id), ('user', user_id)])
+        db.session.commit()
+
+        return jsonify({'message': 'Successfully joined the organization.'}), 200
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Database error occurred.'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Endpoint membuat presensi
+@bp.route('/api/add-presences', methods=['POST'])
+def create_presence():
+    data = request.get_json()
+    user_id = data.get('user_id')
+    org_id = data.get('org_id')
+
+    try:
+        session_date = date.fromisoformat(data.get('date'))
+        time_open = time.fromisoformat(data.get('time_open'))
+        time_close = time.fromisoformat(data.get('time_close'))
+    except (TypeError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': 'date (YYYY-MM-DD), time_open and time_close (HH:MM[:SS]) are required'
+        }), 400
+
+    new_presence = AttendanceSession(user_id=user_id, org_id=org_id, date=session_date, time_open=time_open, time_close=time_close,
+                                     status=initial_status(session_date, time_open, time_close))
+    db.session.add(new_presence)
+    db.session.commit()
+
+    return jsonify({
+        'status': 'success',
+        'data': schema.attendance_session_schema.dump(new_presence),
+        'message': 'presence created successfully'
+    }), 201
+
+
+def _check_accepting(attendance_session_id):
+    state = session_scheduler.state(attendance_session_id)
+    if state is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'attendance session not found'
+        }), 404
+    if state != OPEN:
+        return jsonify({
+            'status': 'error',
+            'message': 'attendance session is %s and not accepting check-ins' % state
+        }), 409
+    return None
+
+
+# Endpoint presensi user
+@bp.route('/api/presences', methods=['POST'])
+def fill_presence():
+    data = request.get_json()
+    user_id = data.get('user_id')
+    attendance_session_id = data.get('attendance_session_id')
+    status = data.get('status')
+
+    if not isinstance(attendance_session_id, int) or not isinstance(user_id, int) or not status:
+        return jsonify({
+            'status': 'error',
+            'message': 'attendance_session_id, user_id and status are required'
+        }), 400
+
+    # Dijawab dari memori scheduler, tanpa query ke database
+    error = _check_accepting(attendance_session_id)
+    if error:
+        return error
+
+    new_presence = AttendanceRecord(user_id=user_id, attendance_session_id=attendance_session_id, status=status)
+    db.session.add(new_presence)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Unique constraint (attendance_session_id, user_id): presensi ganda dari retry tanpa Idempotency-Key
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': 'user already has a presence in this attendance session'
+        }), 409
+
+    return jsonify({
+        'status': 'success',
+        'data': schema.attendance_record_schema.dump(new_presence),
+        'message': 'Presence filled successfully'
+    }), 201
+
+
+# Endpoint presensi banyak user sekaligus untuk satu sesi
+@bp.route('/api/presences/batch', methods=['POST'])
+def fill_presences_batch():
+    data = request.get_json()
+    attendance_session_id = data.get('attendance_session_id')
+    records = data.get('records')
+
+    if not isinstance(attendance_session_id, int) or not isinstance(records, list) or not records:
+        return jsonify({
+            'status': 'error',
+            'message': 'attendance_session_id and a non-empty records list are required'
+        }), 400
+
+    error = _check_accepting(attendance_session_id)
+    if error:
+        return error
+
+    # Validasi semua baris dulu, kumpulkan user_id yang valid
+    results = []
+    valid = {}
+    for row in records:
+        user_id = row.get('user_id') if isinstance(row, dict) else None
+        status = row.get('status') if isinstance(row, dict) else None
+        result = {'user_id': user_id}
+        results.append(result)
+        if not isinstance(user_id, int) or not isinstance(status, str) or not status:
+            result.update(result='error', message='user_id and status are required')
+        elif user_id in valid:
+            result.update(result='error', message='duplicate user_id in batch')
+        else:
+            valid[user_id] = (status, result)
+
+    for attempt in range(2):
+        # Sesi dikunci sampai commit, jadi batch untuk sesi yang sama berjalan
+        # bergantian dan status lama yang dibaca _write_batch tetap berlaku
+        session = db.session.get(AttendanceSession, attendance_session_id, with_for_update=True)
+        if not session:
+            return jsonify({
+                'status': 'error',
+                'message': 'attendance session not found'
+            }), 404
+        try:
+            written = _write_batch(session, valid)
+        except IntegrityError:
+            written = False
+        if written is None:
+            return jsonify({
+                'status': 'error',
+                'data': results,
+                'message': 'no valid presence in batch'
+            }), 400
+        if written:
+            db.session.commit()
+            break
+        # /api/presences menyimpan presensi atlet yang sama di antara baca
+        # dan tulis; ulangi sekali dengan data terbaru
+        db.session.rollback()
+    else:
+        return jsonify({
+            'status': 'error',
+            'message': 'presences changed while saving, please retry'
+        }), 409
+
+    return jsonify({
+        'status': 'success',
+        'data': results,
+        'message': 'Presences filled successfully'
+    }), 200
+
+
+def _write_batch(session, valid):
+    """Upsert the ``valid`` {user_id: (status, result)} rows of one batch.
+
+    One SELECT reads membership and existing records, then new records
+    are written with one INSERT and changed ones with one upsert. Returns
+    None when no user is a member, False when another request inserted
+    one of the new records first, True otherwise.
+    """
+    existing = {
+        row.user_id: row for row in db.session.execute(
+            select(OrgMember.user_id, AttendanceRecord.id, AttendanceRecord.status)
+            .outerjoin(AttendanceRecord, and_(AttendanceRecord.user_id == OrgMember.user_id,
+                                              AttendanceRecord.attendance_session_id == session.id))
+            .where(OrgMember.org_id == session.org_id, OrgMember.user_id.in_(valid))
+        )
+    }
+    if not existing:
+        for status, result in valid.values():
+            result.update(result='error', message='user is not a member of this organization')
+        return None
+
+    new_rows, changed_rows, deltas = [], [], Counter()
+    for user_id, (status, result) in valid.items():
+        row = {'attendance_session_id': session.id, 'user_id': user_id, 'status': status}
+        record = existing.get(user_id)
+        if record is None:
+            result.update(result='error', message='user is not a member of this organization')
+        elif record.id is None:
+            new_rows.append(row)
+            deltas[user_id, session.id, status] += 1
+            result.update(result='created', status=status)
+        else:
+            if record.status != status:
+                changed_rows.append(row)
+                deltas[user_id, session.id, record.status] -= 1
+                deltas[user_id, session.id, status] += 1
+            result.update(result='updated' if record.status != status else 'unchanged', id=record.id, status=status)
+
+    dialect = db.engine.dialect.name
+    index_elements = ['attendance_session_id', 'user_id']
+    if new_rows:
+        # Jumlah baris yang benar-benar masuk harus sama; kalau kurang, presensi
+        # itu sudah ada dan delta ringkasan di atas tidak berlaku lagi
+        inserted = db.session.execute(insert_ignore(AttendanceRecord, dialect, index_elements).values(new_rows))
+        if inserted.rowcount != len(new_rows):
+            return False
+    if changed_rows:
+        db.session.execute(upsert(AttendanceRecord, dialect, index_elements, ['status']).values(changed_rows))
+
+    # INSERT/upsert Core tidak lewat flush: ringkasan, feed SSE dan cache
+    # diperbarui di sini, dalam transaksi yang sama
+    apply_deltas(db.session, deltas)
+    written = [row['user_id'] for row in (*new_rows, *changed_rows)]
+    if written:
+        for record in db.session.execute(
+            select(AttendanceRecord.id, AttendanceRecord.attendance_session_id, AttendanceRecord.user_id,
+                   AttendanceRecord.status)
+            .where(AttendanceRecord.attendance_session_id == session.id, AttendanceRecord.user_id.in_(written))
+        ):
+            valid[record.user_id][1]['id'] = record.id
+            attendance_feed.publish_on_commit(db.session, session.id, 'record', record_payload(record))
+        response_cache.invalidate_on_commit(db.session, objs=[session], keys=[('user', user_id) for user_id in written])
+    return True
+
+
+# Endpoint stream Server-Sent Events untuk satu sesi presensi: snapshot
+# awal lalu hanya perubahan (record baru/berubah dan status sesi)
+@bp.route('/api/attendance-sessions/<int:id>/stream', methods=['GET'])
+def stream_attendance_session(id):
+    subscription = attendance_feed.subscribe(id)
+    session = db.session.get(AttendanceSession, id)
+    if not session:
+        subscription.close()
+        return jsonify({
+            'status': 'error',
+            'message': 'attendance session not found'
+        }), 404
+
+    records = db.session.scalars(
+        select(AttendanceRecord).where(AttendanceRecord.attendance_session_id == id).order_by(AttendanceRecord.id)
+    )
+    snapshot = {
+        'session': {'id': session.id, 'status': session.status},
+        'records': [record_payload(record) for record in records],
+    }
+    # Lepas koneksi database sebelum stream yang bisa berjalan lama
+    db.session.remove()
+    return attendance_feed.stream(subscription, [('snapshot', snapshot)])
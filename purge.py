@@ -0,0 +1,279 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import (
+    db, utcnow, User, Organization, OrgMember, AttendanceSession, AttendanceRecord, AttendanceSummary,
+    SessionSchedule, PurgeClaim,
+)
+from sync import prune_tombstones, record_tombstones
+
+users = User.__table__
+organizations = Organization.__table__
+org_members = OrgMember.__table__
+attendance_sessions = AttendanceSession.__table__
+attendance_records = AttendanceRecord.__table__
+attendance_summaries = AttendanceSummary.__table__
+session_schedules = SessionSchedule.__table__
+purge_claims = PurgeClaim.__table__
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def _organization_steps(org_id):
+    """(table, query selecting ids to delete) in FK-safe order for one organization."""
+    sessions = select(attendance_sessions.c.id).where(attendance_sessions.c.org_id == org_id)
+    return [
+        (attendance_records, select(attendance_records.c.id).where(attendance_records.c.attendance_session_id.in_(sessions))),
+        (attendance_sessions, sessions),
+        (session_schedules, select(session_schedules.c.id).where(session_schedules.c.org_id == org_id)),
+        (attendance_summaries, select(attendance_summaries.c.id).where(attendance_summaries.c.org_id == org_id)),
+        (org_members, select(org_members.c.id).where(org_members.c.org_id == org_id)),
+        (organizations, select(organizations.c.id).where(organizations.c.id == org_id)),
+    ]
+
+
+def _user_updates(user_id):
+    """UPDATE statements run before ``_user_steps`` for one user."""
+    # Sesi dan jadwal yang dibuat user di organisasi milik orang lain tetap
+    # bagian dari riwayat klub: dipindahkan ke pemilik organisasi, presensi
+    # atlet lain di sesi itu tidak ikut terhapus
+    updates = []
+    for table in (attendance_sessions, session_schedules):
+        owner = select(organizations.c.user_id).where(organizations.c.id == table.c.org_id).scalar_subquery()
+        updates.append(update(table).where(table.c.user_id == user_id).values(user_id=owner))
+    updates.append(
+        update(attendance_records).where(attendance_records.c.uploaded_by == user_id).values(uploaded_by=None))
+    return updates
+
+
+def _user_steps(user_id):
+    # Organisasi milik user ikut terhapus (sudah ditandai deleted_at oleh
+    # endpoint) beserta sesinya; sesi di organisasi lain sudah dipindahkan
+    owned = db.session.scalars(select(organizations.c.id).where(organizations.c.user_id == user_id)).all()
+    steps = [step for org_id in owned for step in _organization_steps(org_id)]
+    return steps + [
+        (attendance_records, select(attendance_records.c.id).where(attendance_records.c.user_id == user_id)),
+        (attendance_summaries, select(attendance_summaries.c.id).where(attendance_summaries.c.user_id == user_id)),
+        (org_members, select(org_members.c.id).where(org_members.c.user_id == user_id)),
+        (users, select(users.c.id).where(users.c.id == user_id)),
+    ]
+
+
+STEPS = {
+    'user': (users, _user_steps),
+    'organization': (organizations, _organization_steps),
+}
+
+
+class PurgeQueue:
+    """Remove soft-deleted users and organizations in the background.
+
+    DELETE endpoints only set ``deleted_at`` and ``enqueue`` a job. A
+    daemon thread then removes dependent rows table by table, at most
+    PURGE_BATCH_SIZE ids per ``DELETE ... WHERE id IN (...)`` and one
+    commit per batch, pausing PURGE_BATCH_PAUSE seconds between batches.
+    A failed job is retried after PURGE_RETRY_SECONDS. Deleted rows leave
+    sync tombstones (sync.py), which are pruned after SYNC_TOMBSTONE_DAYS.
+    Sessions a deleted user created in other owners' organizations are
+    handed to those owners and keep their attendance records.
+
+    Rows still marked are queued again the first time a process uses the
+    queue (``enqueue`` or ``progress``), so unfinished purges resume after
+    a restart once the next DELETE or deletion status request arrives.
+    Each job is claimed in ``purge_claims`` first: when several worker
+    processes queue the same row, only one purges it. A claim not renewed
+    for PURGE_CLAIM_SECONDS, e.g. after a crash, is taken over. ``progress``
+    reports a job of this process, or derives pending/done from the
+    database otherwise.
+    """
+
+    def __init__(self, app=None):
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._owner = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PURGE_BATCH_SIZE', 500)
+        app.config.setdefault('PURGE_BATCH_PAUSE', 0.05)
+        app.config.setdefault('PURGE_RETRY_SECONDS', 30)
+        app.config.setdefault('PURGE_CLAIM_SECONDS', 300)
+        self.app = app
+        self.batch_size = app.config['PURGE_BATCH_SIZE']
+        self.pause = app.config['PURGE_BATCH_PAUSE']
+        self.retry = app.config['PURGE_RETRY_SECONDS']
+        self.claim_seconds = app.config['PURGE_CLAIM_SECONDS']
+        app.extensions['purge_queue'] = self
+
+    def start(self):
+        """Queue unfinished purges and start the thread, once per process."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._owner = uuid.uuid4().hex
+            self._jobs.clear()
+            self._queue = queue.Queue()
+            with self.app.app_context():
+                for kind, (table, _) in STEPS.items():
+                    for id in db.session.scalars(select(table.c.id).where(table.c.deleted_at.isnot(None))):
+                        self._add(kind, id)
+            threading.Thread(target=self._run, name='purge-queue', daemon=True).start()
+
+    def _add(self, kind, id):
+        key = (kind, id)
+        job = self._jobs.get(key)
+        if job is None or job['status'] in (DONE, FAILED):
+            job = self._jobs[key] = {
+                'kind': kind, 'id': id, 'status': PENDING, 'deleted': {},
+                'error': None, 'started_at': None, 'finished_at': None,
+            }
+            self._queue.put(key)
+        return job
+
+    def enqueue(self, kind, id):
+        """Queue the purge of a ``user`` or ``organization`` already marked deleted."""
+        self.start()
+        with self._lock:
+            return dict(self._add(kind, id))
+
+    def progress(self, kind, id):
+        """Return the job for ``kind``/``id``, or None if it is not being deleted."""
+        self.start()
+        with self._lock:
+            job = self._jobs.get((kind, id))
+            if job is not None:
+                return dict(job, deleted=dict(job['deleted']))
+
+        table = STEPS[kind][0]
+        row = db.session.execute(select(table.c.deleted_at).where(table.c.id == id)).first()
+        if row is None:
+            # Sudah tidak ada: selesai dipurge (mungkin oleh proses lain)
+            return {'kind': kind, 'id': id, 'status': DONE}
+        if row.deleted_at is not None:
+            return {'kind': kind, 'id': id, 'status': PENDING}
+        return None
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            job = self._jobs[key]
+            job.update(status=RUNNING, error=None, started_at=job['started_at'] or _now())
+            try:
+                claimed = self._purge(job)
+            except Exception as e:
+                self.app.logger.exception('purge of %s %s failed', *key)
+                job.update(status=FAILED, error=str(e))
+                self._retry_later(self.retry, key)
+            else:
+                if claimed:
+                    job.update(status=DONE, finished_at=_now())
+                else:
+                    # Dikerjakan proses lain: progress dibaca dari database,
+                    # dicek lagi setelah klaimnya bisa kedaluwarsa
+                    with self._lock:
+                        self._jobs.pop(key, None)
+                    self._retry_later(self.claim_seconds, key)
+
+    def _retry_later(self, delay, key):
+        timer = threading.Timer(delay, self._retry, key)
+        timer.daemon = True
+        timer.start()
+
+    def _retry(self, kind, id):
+        with self._lock:
+            self._add(kind, id)
+
+    def _claim(self, kind, id):
+        """Claim or renew ``kind``/``id`` for this process, inside the current transaction."""
+        now = utcnow()
+        result = db.session.execute(
+            update(purge_claims)
+            .where(purge_claims.c.kind == kind, purge_claims.c.row_id == id,
+                   or_(purge_claims.c.claimed_by == self._owner,
+                       purge_claims.c.claimed_at < now - timedelta(seconds=self.claim_seconds)))
+            .values(claimed_by=self._owner, claimed_at=now)
+        )
+        if result.rowcount:
+            return True
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    insert(purge_claims).values(kind=kind, row_id=id, claimed_by=self._owner, claimed_at=now))
+        except IntegrityError:
+            # Klaim proses lain yang masih aktif
+            return False
+        return True
+
+    def _purge(self, job):
+        """Run ``job``; False if another process holds its claim."""
+        kind, id = job['kind'], job['id']
+        with self.app.app_context():
+            table = STEPS[kind][0]
+            if db.session.scalar(select(table.c.id).where(table.c.id == id)) is None:
+                # Sudah dipurge, mungkin oleh proses lain yang berhenti
+                # sebelum sempat melepas klaimnya
+                self._release(kind, id)
+                return True
+            if not self._claim(kind, id):
+                db.session.rollback()
+                return False
+            db.session.commit()
+
+            if kind == 'user':
+                for statement in _user_updates(id):
+                    db.session.execute(statement)
+                db.session.commit()
+
+            for table, ids_query in STEPS[kind][1](id):
+                while True:
+                    ids = db.session.scalars(ids_query.limit(self.batch_size)).all()
+                    if not ids:
+                        break
+                    # Klaim diperbarui di transaksi yang sama dengan DELETE,
+                    # jadi batch tidak jalan lagi setelah diambil alih proses lain
+                    if not self._claim(kind, id):
+                        db.session.rollback()
+                        return False
+                    # Client /api/sync yang belum sinkron tetap diberi tahu baris ini hilang
+                    record_tombstones(table, ids)
+                    result = db.session.execute(delete(table).where(table.c.id.in_(ids)))
+                    db.session.commit()
+                    if table is attendance_sessions and 'session_scheduler' in self.app.extensions:
+                        # Sesi yang dihapus dijawab 404, bukan "closed" dari memori scheduler
+                        self.app.extensions['session_scheduler'].forget(ids)
+                    job['deleted'][table.name] = job['deleted'].get(table.name, 0) + result.rowcount
+                    if self.pause:
+                        time.sleep(self.pause)
+            prune_tombstones(self.app.config['SYNC_TOMBSTONE_DAYS'])
+            self._release(kind, id)
+
+            # DELETE Core tidak lewat flush; invalidasi tanpa id mengosongkan
+            # seluruh cache, termasuk response yang memuat baris di atas
+            response_cache = self.app.extensions.get('response_cache')
+            if response_cache is not None:
+                response_cache.invalidate('organization')
+        return True
+
+    def _release(self, kind, id):
+        db.session.execute(delete(purge_claims).where(purge_claims.c.kind == kind, purge_claims.c.row_id == id))
+        db.session.commit()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,66 @@
+from sqlalchemy import func, select
+
+from models import User, AttendanceSession, AttendanceRecord
+
+# Query laporan presensi, dipakai oleh organizations.py (WSGI) dan asgi.py (async)
+
+
+def session_date_filters(org_id, start, end):
+    filters = [AttendanceSession.org_id == org_id]
+    if start:
+        filters.append(AttendanceSession.date >= start)
+    if end:
+        filters.append(AttendanceSession.date <= end)
+    return filters
+
+
+def attendance_stats_queries(org_id, start, end):
+    """Return the (per member, per session) GROUP BY selects for an organization."""
+    filters = session_date_filters(org_id, start, end)
+
+    member_query = select(
+        AttendanceRecord.user_id, User.name, AttendanceRecord.status, func.count(AttendanceRecord.id)
+    ).select_from(AttendanceSession).join(AttendanceSession.attendance_records).join(AttendanceRecord.user).where(
+        *filters
+    ).group_by(AttendanceRecord.user_id, User.name, AttendanceRecord.status)
+
+    session_query = select(
+        AttendanceSession.id, AttendanceSession.date, AttendanceRecord.status, func.count(AttendanceRecord.id)
+    ).outerjoin(AttendanceSession.attendance_records).where(
+        *filters
+    ).group_by(AttendanceSession.id, AttendanceSession.date, AttendanceRecord.status)
+
+    return member_query, session_query
+
+
+def attendance_stats(org_id, start, end, member_rows, session_rows):
+    """Build the attendance-stats response data from the grouped rows."""
+    totals = {}
+    members = {}
+    for user_id, name, status, count in member_rows:
+        member = members.setdefault(user_id, {'user_id': user_id, 'name': name, 'counts': {}, 'total': 0})
+        member['counts'][status] = count
+        member['total'] += count
+        totals[status] = totals.get(status, 0) + count
+
+    sessions = {}
+    for session_id, session_date, status, count in session_rows:
+        session = sessions.setdefault(session_id, {
+            'attendance_session_id': session_id,
+            'date': session_date.isoformat(),
+            'counts': {},
+            'total': 0,
+        })
+        # Sesi tanpa presensi tetap muncul dengan counts kosong
+        if status is not None:
+            session['counts'][status] = count
+            session['total'] += count
+
+    return {
+        'org_id': org_id,
+        'from': start.isoformat() if start else None,
+        'to': end.isoformat() if end else None,
+        'totals': totals,
+        'members': sorted(members.values(), key=lambda m: m['user_id']),
+        'sessions': sorted(sessions.values(), key=lambda s: (s['date'], s['attendance_session_id'])),
+    }
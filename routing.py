@@ -0,0 +1,115 @@
+import itertools
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session as BaseSession
+
+# Method HTTP yang dianggap hanya membaca
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+LAST_WRITE_COOKIE = 'db_last_write'
+
+
+class AppSession(BaseSession):
+    """Base class of every ORM session the app opens.
+
+    ``RoutingSession`` (Flask) and the async sessions of asgi.py both
+    derive from it, so the flush and commit listeners that extensions
+    attach here see writes from either entry point.
+    """
+
+
+class RoutingSession(Session, AppSession):
+    """Session that sends the reads of read-only requests to a replica.
+
+    A read goes to a replica when the request method is GET/HEAD/OPTIONS,
+    nothing has been written to the primary in this request yet, and the
+    client is outside its read-your-writes window. Everything else uses
+    the primary, as does any work outside a request (CLI, seeding).
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            replicas = current_app.extensions.get('read_replicas')
+            if replicas is not None:
+                if self._flushing or getattr(clause, 'is_dml', False):
+                    g._db_wrote = True
+                elif replicas.use_replica():
+                    return replicas.engine_for_request()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_primary():
+    """Send every read of the current request to the primary, e.g. when replication lag would lose rows."""
+    g._db_primary = True
+
+
+class ReadReplicas:
+    """Read replica engines for ``RoutingSession``.
+
+    Configuration (read from ``app.config``):
+
+    SQLALCHEMY_REPLICA_URIS
+        List of replica database URLs; empty disables routing. SQLite
+        URLs must be absolute (``sqlite:////path/replica.db``).
+    READ_YOUR_WRITES_SECONDS
+        When above ``0``, a request that writes sets a cookie and that
+        client's reads go to the primary for this many seconds, so it
+        sees its own changes despite replication lag.
+
+    Replicas use the primary's ``SQLALCHEMY_ENGINE_OPTIONS``, so
+    initialise this after ``DatabasePool``.
+    """
+
+    def __init__(self, app=None):
+        self.engines = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [])
+        app.config.setdefault('READ_YOUR_WRITES_SECONDS', 0)
+
+        self.dispose()
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+        self.engines = [create_engine(url, **options) for url in app.config['SQLALCHEMY_REPLICA_URIS']]
+        self.window = app.config['READ_YOUR_WRITES_SECONDS']
+        self._next = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+        if not self.engines:
+            return
+
+        app.after_request(self._after_request)
+        app.extensions['read_replicas'] = self
+
+    def dispose(self):
+        for engine in self.engines:
+            engine.dispose()
+
+    def use_replica(self):
+        if request.method not in READ_METHODS or g.get('_db_wrote') or g.get('_db_primary'):
+            return False
+        if self.window:
+            try:
+                last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+            except ValueError:
+                last_write = 0
+            if time.time() - last_write < self.window:
+                return False
+        return True
+
+    def engine_for_request(self):
+        # Satu request memakai satu replica supaya semua query-nya konsisten
+        engine = g.get('_db_replica')
+        if engine is None:
+            with self._lock:
+                engine = g._db_replica = next(self._next)
+        return engine
+
+    def _after_request(self, response):
+        if self.window and g.get('_db_wrote'):
+            response.set_cookie(LAST_WRITE_COOKIE, '%.3f' % time.time(), max_age=int(self.window) or 1,
+                                httponly=True, samesite='Lax')
+        return response
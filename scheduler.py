@@ -0,0 +1,261 @@
+import heapq
+import itertools
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select, update
+
+from models import db, AttendanceSession
+from routing import AppSession
+
+SCHEDULED = 'scheduled'
+OPEN = 'open'
+CLOSED = 'closed'
+
+# Batas jumlah id per UPDATE ... WHERE id IN (...)
+UPDATE_CHUNK_SIZE = 500
+
+
+def session_window(session_date, time_open, time_close):
+    """Return the (opens_at, closes_at) datetimes of a session.
+
+    A close time at or before the open time means the session runs past
+    midnight.
+    """
+    opens_at = datetime.combine(session_date, time_open)
+    closes_at = datetime.combine(session_date, time_close)
+    if closes_at <= opens_at:
+        closes_at += timedelta(days=1)
+    return opens_at, closes_at
+
+
+def initial_status(session_date, time_open, time_close, now=None):
+    opens_at, closes_at = session_window(session_date, time_open, time_close)
+    now = now or datetime.now()
+    if now >= closes_at:
+        return CLOSED
+    return OPEN if now >= opens_at else SCHEDULED
+
+
+class SessionScheduler:
+    """Open and close attendance sessions on time and answer check-in checks from memory.
+
+    Every session that is not closed yet is kept in memory with its
+    open/close times, plus a heap of the next transition of each. A
+    background thread pops due transitions and flips ``status`` with one
+    ``UPDATE ... WHERE id IN (...)`` per batch. Sessions created or
+    changed through the ORM are picked up after commit.
+
+    Ids of sessions closed in this process, by the thread or by a commit,
+    are kept in a set so ``state`` answers them without a query. Any
+    other id not in memory costs one lookup, so deleted or unknown ids
+    are reported as missing rather than closed.
+
+    Times are the server's local time. Set SCHEDULER_ENABLED to False to
+    turn the thread off; ``state`` then always reads the database.
+    """
+
+    def __init__(self, app=None, clock=datetime.now):
+        self.clock = clock
+        self._sessions = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = set()
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SCHEDULER_ENABLED', True)
+        app.config.setdefault('SCHEDULER_RETRY_SECONDS', 5)
+        self.app = app
+        self.enabled = app.config['SCHEDULER_ENABLED']
+        self.retry = timedelta(seconds=app.config['SCHEDULER_RETRY_SECONDS'])
+        app.extensions['session_scheduler'] = self
+
+        if not event.contains(AppSession, 'after_flush', self._after_flush):
+            event.listen(AppSession, 'after_flush', self._after_flush)
+            event.listen(AppSession, 'after_commit', self._after_commit)
+            event.listen(AppSession, 'after_rollback', self._after_rollback)
+
+    def start(self):
+        """Load open sessions and start the thread, once per process.
+
+        Called lazily by ``state`` so that forked server workers each
+        start their own thread.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._condition:
+            if self._pid == os.getpid():
+                return
+            self._sessions.clear()
+            self._heap.clear()
+            self._closed.clear()
+            with self.app.app_context():
+                rows = db.session.execute(
+                    select(AttendanceSession.id, AttendanceSession.date, AttendanceSession.time_open,
+                           AttendanceSession.time_close, AttendanceSession.status)
+                    .where(AttendanceSession.status != CLOSED)
+                )
+                for row in rows:
+                    self._track(*row)
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='session-scheduler', daemon=True).start()
+
+    def _track(self, id, session_date, time_open, time_close, status):
+        # Dipanggil dengan self._condition terkunci
+        if status == CLOSED:
+            self._sessions.pop(id, None)
+            self._closed.add(id)
+            return
+        self._closed.discard(id)
+        opens_at, closes_at = session_window(session_date, time_open, time_close)
+        self._sessions[id] = (opens_at, closes_at, status)
+        if status == SCHEDULED:
+            heapq.heappush(self._heap, (opens_at, next(self._counter), id, OPEN))
+        heapq.heappush(self._heap, (closes_at, next(self._counter), id, CLOSED))
+        self._condition.notify()
+
+    def state(self, id):
+        """Return 'scheduled', 'open' or 'closed' for session ``id``, or None if it does not exist."""
+        if not self.enabled:
+            row = db.session.execute(
+                select(AttendanceSession.date, AttendanceSession.time_open, AttendanceSession.time_close,
+                       AttendanceSession.status).where(AttendanceSession.id == id)
+            ).first()
+            return self._effective(*session_window(*row[:3]), row[3]) if row else None
+
+        self.start()
+        entry = self._sessions.get(id)
+        if entry is None:
+            if id in self._closed:
+                return CLOSED
+            row = db.session.execute(
+                select(AttendanceSession.id, AttendanceSession.date, AttendanceSession.time_open,
+                       AttendanceSession.time_close, AttendanceSession.status).where(AttendanceSession.id == id)
+            ).first()
+            if row is None:
+                return None
+            if row.status == CLOSED:
+                # Ditutup sebelum proses ini jalan atau oleh proses lain: tidak
+                # disimpan, supaya penghapusannya nanti tetap terlihat
+                return CLOSED
+            with self._condition:
+                self._track(*row)
+            entry = self._sessions[id]
+        return self._effective(*entry)
+
+    def _effective(self, opens_at, closes_at, status):
+        # Jam dicek langsung, jadi jawaban tetap benar walau thread terlambat
+        if status == CLOSED:
+            return CLOSED
+        now = self.clock()
+        if now >= closes_at:
+            return CLOSED
+        return OPEN if now >= opens_at else SCHEDULED
+
+    def is_accepting(self, id):
+        return self.state(id) == OPEN
+
+    def _run(self):
+        while True:
+            with self._condition:
+                now = self.clock()
+                while not self._heap or self._heap[0][0] > now:
+                    timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+                    # Bangun paling lambat tiap menit untuk mengikuti perubahan jam sistem
+                    self._condition.wait(min(timeout, 60) if timeout is not None else 60)
+                    now = self.clock()
+                due = {OPEN: {}, CLOSED: {}}
+                while self._heap and self._heap[0][0] <= now:
+                    when, _, id, status = heapq.heappop(self._heap)
+                    entry = self._sessions.get(id)
+                    # Lewati entri lama yang sudah digantikan jadwal baru
+                    if entry is None or entry[2] == CLOSED:
+                        continue
+                    if status == OPEN and (entry[2] != SCHEDULED or when < entry[0] or entry[1] <= now):
+                        continue
+                    if status == CLOSED and when < entry[1]:
+                        continue
+                    due[status][id] = None
+            for status, ids in due.items():
+                if ids:
+                    self._apply(status, list(ids))
+
+    def _apply(self, status, ids):
+        try:
+            with self.app.app_context():
+                for i in range(0, len(ids), UPDATE_CHUNK_SIZE):
+                    chunk = ids[i:i + UPDATE_CHUNK_SIZE]
+                    db.session.execute(
+                        update(AttendanceSession)
+                        .where(AttendanceSession.id.in_(chunk), AttendanceSession.status != CLOSED)
+                        .values(status=status)
+                    )
+                db.session.commit()
+        except Exception:
+            self.app.logger.exception('failed to set %d sessions to %s, retrying', len(ids), status)
+            with self._condition:
+                retry_at = self.clock() + self.retry
+                for id in ids:
+                    heapq.heappush(self._heap, (retry_at, next(self._counter), id, status))
+            return
+
+        with self._condition:
+            for id in ids:
+                entry = self._sessions.get(id)
+                if entry is None:
+                    continue
+                if status == CLOSED:
+                    del self._sessions[id]
+                    self._closed.add(id)
+                else:
+                    self._sessions[id] = entry[:2] + (status,)
+
+        feed = self.app.extensions.get('attendance_feed')
+        if feed is not None:
+            for id in ids:
+                feed.publish(id, 'session', {'id': id, 'status': status})
+
+    def track_on_commit(self, session, rows):
+        """Track sessions written with Core statements, which skip the flush, when ``session`` commits.
+
+        ``rows`` are (id, date, time_open, time_close, status) tuples.
+        """
+        pending = session.info.setdefault('session_scheduler_pending', {})
+        for row in rows:
+            pending[row[0]] = tuple(row)
+
+    def forget(self, ids):
+        """Drop sessions deleted with Core statements, e.g. by purge.py."""
+        with self._condition:
+            for id in ids:
+                self._sessions.pop(id, None)
+                self._closed.discard(id)
+
+    def _after_flush(self, session, flush_context):
+        pending = session.info.setdefault('session_scheduler_pending', {})
+        for obj in (*session.new, *session.dirty):
+            if isinstance(obj, AttendanceSession):
+                pending[obj.id] = (obj.id, obj.date, obj.time_open, obj.time_close, obj.status)
+        for obj in session.deleted:
+            if isinstance(obj, AttendanceSession):
+                pending[obj.id] = None
+
+    def _after_commit(self, session):
+        pending = session.info.pop('session_scheduler_pending', None)
+        if not pending or self._pid != os.getpid():
+            return
+        with self._condition:
+            for id, row in pending.items():
+                if row is None:
+                    self._sessions.pop(id, None)
+                    self._closed.discard(id)
+                else:
+                    self._track(*row)
+
+    def _after_rollback(self, session):
+        session.info.pop('session_scheduler_pending', None)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from sqlalchemy import insert, select
+
+from models import db, AttendanceSession
+from scheduler import initial_status
+
+attendance_sessions = AttendanceSession.__table__
+
+
+def schedule_dates(weekday, start_date, end_date):
+    """Yield every date from ``start_date`` to ``end_date`` (inclusive) falling on ``weekday``."""
+    day = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+    while day <= end_date:
+        yield day
+        day += timedelta(days=7)
+
+
+def generate_sessions(schedules, now=None):
+    """Insert the attendance sessions of ``schedules`` with one executemany INSERT.
+
+    The schedules must be flushed (have ids). Returns the
+    (id, date, time_open, time_close, status) rows of the new sessions,
+    for ``SessionScheduler.track_on_commit``. Nothing is committed.
+    """
+    rows = [
+        {
+            'schedule_id': schedule.id, 'org_id': schedule.org_id, 'user_id': schedule.user_id, 'date': day,
+            'time_open': schedule.time_open, 'time_close': schedule.time_close,
+            'status': initial_status(day, schedule.time_open, schedule.time_close, now),
+        }
+        for schedule in schedules
+        for day in schedule_dates(schedule.weekday, schedule.start_date, schedule.end_date)
+    ]
+    if not rows:
+        return []
+    db.session.execute(insert(attendance_sessions), rows)
+    return db.session.execute(
+        select(attendance_sessions.c.id, attendance_sessions.c.date, attendance_sessions.c.time_open,
+               attendance_sessions.c.time_close, attendance_sessions.c.status)
+        .where(attendance_sessions.c.schedule_id.in_([schedule.id for schedule in schedules]))
+    ).all()
@@ -1,42 +1,64 @@
-from models import User, Organization, OrgMember, AttendanceSession, AttendanceRecord
+from models import User, Organization, OrgMember, AttendanceSession, AttendanceRecord, SessionSchedule
 from flask_marshmallow import Marshmallow
+from metrics import timed
 
 ma = Marshmallow()
 
-class UserLoginSchema(ma.SQLAlchemyAutoSchema):
+class BaseSchema(ma.SQLAlchemyAutoSchema):
+    # Catat waktu serialisasi per request (lihat metrics.py)
+    def dump(self, obj, *, many=None):
+        with timed('serialize'):
+            return super().dump(obj, many=many)
+
+class UserLoginSchema(BaseSchema):
     class Meta:
         model = User
-        exclude = ['password']
+        exclude = ['password', 'deleted_at']
 
     organizations = ma.Nested('OrganizationSchema', many=True) 
     org_members = ma.Nested('OrgMemberSchema', many=True)
 
-class UserRegisterSchema(ma.SQLAlchemyAutoSchema):
+class UserRegisterSchema(BaseSchema):
+    class Meta:
+        model = User
+        exclude = ['password', 'deleted_at']
+
+
+class UserSummarySchema(BaseSchema):
     class Meta:
         model = User
-        exclude = ['password']
+        exclude = ['password', 'deleted_at']
 
 
-class UserSchema(ma.SQLAlchemyAutoSchema):
+class UserSchema(BaseSchema):
     class Meta:
         model = User
-        exclude = ['password']
+        exclude = ['password', 'deleted_at']
 
     organizations = ma.Nested('OrganizationSchema', many=True, exclude=['member']) 
     org_members = ma.Nested('OrgMemberSchema', many=True)  
     attendance_sessions = ma.Nested('AttendanceSessionSchema', many=True)  
     attendance_records = ma.Nested('AttendanceRecordSchema', many=True) 
 
-class OrganizationCreteSchema(ma.SQLAlchemyAutoSchema):
+class OrganizationCreteSchema(BaseSchema):
     class Meta:
         model = Organization
+        exclude = ['deleted_at']
 
     created_by = ma.Nested('UserSchema', only=['name', 'email', 'role'])
 
     
-class OrganizationSchema(ma.SQLAlchemyAutoSchema):
+class OrganizationSummarySchema(BaseSchema):
     class Meta:
         model = Organization
+        include_fk = True
+        exclude = ['deleted_at']
+
+
+class OrganizationSchema(BaseSchema):
+    class Meta:
+        model = Organization
+        exclude = ['deleted_at']
     
     member = ma.Nested('OrgMemberSchema', many=True)
     attendance_sessions = ma.Nested('AttendanceSessionSchema', many=True) 
@@ -44,22 +66,34 @@ class OrganizationSchema(ma.SQLAlchemyAutoSchema):
     attendance_records = ma.Nested('AttendanceRecordSchema', many=True)
 
 
-class OrgMemberSchema(ma.SQLAlchemyAutoSchema):
+class OrgMemberSchema(BaseSchema):
     class Meta:
         model = OrgMember
         exclude = ['id']
 
     user = ma.Nested('UserSchema', only=['name', 'email', 'role', 'id'])
     
-class AttendanceSessionSchema(ma.SQLAlchemyAutoSchema):
+class AttendanceSessionSchema(BaseSchema):
     class Meta:
         model = AttendanceSession
 
     created_by = ma.Nested('UserSchema', only=['name'])
     organization = ma.Nested('OrganizationSchema', only=['name'])
+
+
+class AttendanceSessionSummarySchema(BaseSchema):
+    class Meta:
+        model = AttendanceSession
+        include_fk = True
+
+
+class SessionScheduleSchema(BaseSchema):
+    class Meta:
+        model = SessionSchedule
+        include_fk = True
     
 
-class AttendanceRecordSchema(ma.SQLAlchemyAutoSchema):
+class AttendanceRecordSchema(BaseSchema):
     class Meta:
         model = AttendanceRecord
 
@@ -67,22 +101,39 @@ class AttendanceRecordSchema(ma.SQLAlchemyAutoSchema):
     attendance_session = ma.Nested('AttendanceSessionSchema', only=['date', 'time_open', 'time_close'])
 
 
-user_login_schema = UserLoginSchema()
-user_register_schema = UserRegisterSchema()
+# Instance schema dibuat saat pertama kali dipakai (``schema.user_schema``
+# atau ``from schema import user_schema``), bukan saat modul diimpor
+SCHEMAS = {
+    'user_login_schema': (UserLoginSchema, False),
+    'user_register_schema': (UserRegisterSchema, False),
+
+    'user_schema': (UserSchema, False),
+    'users_schema': (UserSchema, True),
+    'users_summary_schema': (UserSummarySchema, True),
+
+    'organization_create_schema': (OrganizationCreteSchema, False),
+
+    'organization_schema': (OrganizationSchema, False),
+    'organizations_schema': (OrganizationSchema, True),
+    'organizations_summary_schema': (OrganizationSummarySchema, True),
 
-user_schema = UserSchema()
-users_schema = UserSchema(many=True)
+    'org_member_schema': (OrgMemberSchema, False),
+    'org_members_schema': (OrgMemberSchema, True),
 
-organization_create_schema = OrganizationCreteSchema()
+    'attendance_session_schema': (AttendanceSessionSchema, False),
+    'attendance_sessions_schema': (AttendanceSessionSchema, True),
+    'attendance_sessions_summary_schema': (AttendanceSessionSummarySchema, True),
 
-organization_schema = OrganizationSchema()
-organizations_schema = OrganizationSchema(many=True)
+    'session_schedules_schema': (SessionScheduleSchema, True),
 
-org_member_schema = OrgMemberSchema()
-org_members_schema = OrgMemberSchema(many=True)
+    'attendance_record_schema': (AttendanceRecordSchema, False),
+    'attendance_records_schema': (AttendanceRecordSchema, True),
+}
 
-attendance_session_schema = AttendanceSessionSchema()
-attendance_sessions_schema = AttendanceSessionSchema(many=True)
 
-attendance_record_schema = AttendanceRecordSchema()
-attendance_records_schema = AttendanceRecordSchema(many=True)
+def __getattr__(name):
+    if name not in SCHEMAS:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    schema_class, many = SCHEMAS[name]
+    # Dua thread bisa sama-sama membuat instance; yang pertama disimpan
+    return globals().setdefault(name, schema_class(many=many))
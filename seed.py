@@ -1,8 +1,8 @@
-from app import app,db
-from models import User, Organization
+from app import create_app
+from models import db, User, Organization
 from werkzeug.security import generate_password_hash
 
-def seed_users():
+def seed_users(app):
     with app.app_context():
         users = [
             User(
@@ -47,26 +47,26 @@ def seed_users():
 
         print("Seeding data User berhasil.")
 
-def seed_organizations():
+def seed_organizations(app):
     with app.app_context():
         organizations = [
             Organization(
                 id=1,
                 name='orgs1',
                 enroll_code='orgs1',
-                created_by=1
+                user_id=1
             ),
             Organization(
                 id=2,
                 name='orgs2',
                 enroll_code='orgs2',
-                created_by=2
+                user_id=2
             ),
             Organization(
                 id=3,
                 name='orgs3',
                 enroll_code='orgs3',
-                created_by=3
+                user_id=3
             ),
         ]
 
@@ -77,5 +77,6 @@ def seed_organizations():
 
 
 if __name__ == '__main__':
-    seed_users()
-    # seed_organizations()
+    app = create_app()
+    seed_users(app)
+    seed_organizations(app)
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from marshmallow import fields
+from sqlalchemy import select
+from sqlalchemy.orm import RelationshipDirection, configure_mappers
+
+from models import db
+
+# Batas jumlah parameter IN per query (SQLite lama membatasi 999)
+IN_CHUNK_SIZE = 500
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _identity(value):
+    return value
+
+
+def _formatter(field):
+    """Return a plain function producing the same output as ``field``."""
+    if isinstance(field, (fields.DateTime, fields.Date, fields.Time)) and field.format in (None, 'iso'):
+        return _isoformat
+    if isinstance(field, (fields.Integer, fields.String, fields.Boolean)):
+        return _identity
+    return lambda value: field._serialize(value, None, None)
+
+
+class CompiledSerializer:
+    """Row-to-dict serializer built once from a schema in schema.py.
+
+    Works on SQLAlchemy Core rows of the model's table. Every nested
+    relationship costs one extra ``IN`` query per level for the whole
+    batch, and no ORM objects are created.
+    """
+
+    def __init__(self, schema):
+        configure_mappers()
+        self.model = schema.opts.model
+        self.table = self.model.__table__
+        mapper = self.model.__mapper__
+
+        self.columns = []
+        self.nested = []
+        for name, field in schema.dump_fields.items():
+            key = field.data_key or name
+            attribute = field.attribute or name
+            if isinstance(field, fields.Nested):
+                relationship = mapper.relationships[attribute]
+                self.nested.append((key, relationship, CompiledSerializer(field.schema)))
+            else:
+                column = mapper.columns[attribute]
+                self.columns.append((key, column.key, _formatter(field)))
+
+    def dump(self, rows):
+        """Serialize Core ``rows`` of this serializer's table into dicts."""
+        results = [
+            {key: fmt(row._mapping[column]) for key, column, fmt in self.columns}
+            for row in rows
+        ]
+        for key, relationship, child in self.nested:
+            self._dump_nested(rows, results, key, relationship, child)
+        return results
+
+    def _dump_nested(self, rows, results, key, relationship, child):
+        local, remote = relationship.local_remote_pairs[0]
+        parent_keys = [row._mapping[local.key] for row in rows]
+
+        if relationship.secondary is not None:
+            # Mis. Organization.attendance_records lewat attendance_sessions
+            query = select(child.table, remote.label('_parent_key')).select_from(
+                child.table.join(relationship.secondary, relationship.secondaryjoin)
+            )
+            group_column = '_parent_key'
+        else:
+            query = select(child.table)
+            group_column = remote.key
+        # Baris yang sudah dihapus (soft delete) tidak ikut, sama seperti query ORM
+        if 'deleted_at' in child.table.c:
+            query = query.where(child.table.c.deleted_at.is_(None))
+
+        children = defaultdict(list)
+        distinct_keys = list({k for k in parent_keys if k is not None})
+        for i in range(0, len(distinct_keys), IN_CHUNK_SIZE):
+            chunk = distinct_keys[i:i + IN_CHUNK_SIZE]
+            for row in db.session.execute(query.where(remote.in_(chunk)).order_by(*child.table.primary_key)):
+                children[row._mapping[group_column]].append(row)
+
+        all_children = [row for k in distinct_keys for row in children[k]]
+        dumped = dict(zip(map(id, all_children), child.dump(all_children)))
+
+        for result, parent_key in zip(results, parent_keys):
+            child_rows = children.get(parent_key, [])
+            if relationship.direction is RelationshipDirection.MANYTOONE:
+                result[key] = dumped[id(child_rows[0])] if child_rows else None
+            else:
+                result[key] = [dumped[id(row)] for row in child_rows]
+
+
+def compile_schema(schema):
+    return CompiledSerializer(schema)
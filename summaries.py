@@ -0,0 +1,201 @@
+from collections import Counter, defaultdict
+from datetime import date
+
+import click
+from sqlalchemy import delete, event, extract, func, inspect, insert, select
+
+from dml import upsert_increment
+from models import db, AttendanceSession, AttendanceRecord, AttendanceSummary, Organization
+from routing import AppSession
+
+attendance_sessions = AttendanceSession.__table__
+attendance_records = AttendanceRecord.__table__
+attendance_summaries = AttendanceSummary.__table__
+
+SUMMARY_KEY = ['user_id', 'org_id', 'month', 'status']
+
+
+def month_key(value):
+    return value.year * 100 + value.month
+
+
+def _old_value(state, name):
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, name)
+
+
+def apply_deltas(session, deltas):
+    """Add ``deltas`` {(user_id, attendance_session_id, status): n} to the summary rows.
+
+    Core writes of attendance records call this themselves, in the same
+    transaction; ORM writes go through ``after_flush``.
+    """
+    deltas = {key: n for key, n in deltas.items() if n}
+    if not deltas:
+        return
+    # Dipanggil di tengah flush: pakai koneksi langsung supaya tidak memicu autoflush
+    connection = session.connection()
+    session_ids = {attendance_session_id for _, attendance_session_id, _ in deltas}
+    sessions = {
+        row.id: (row.org_id, month_key(row.date)) for row in connection.execute(
+            select(attendance_sessions.c.id, attendance_sessions.c.org_id, attendance_sessions.c.date)
+            .where(attendance_sessions.c.id.in_(session_ids))
+        )
+    }
+    counts = Counter()
+    for (user_id, attendance_session_id, status), n in deltas.items():
+        if attendance_session_id in sessions:
+            org_id, month = sessions[attendance_session_id]
+            counts[user_id, org_id, month, status] += n
+    rows = [dict(zip(SUMMARY_KEY, key), count=n) for key, n in counts.items() if n]
+    if rows:
+        connection.execute(upsert_increment(AttendanceSummary, connection.dialect.name, SUMMARY_KEY, 'count'), rows)
+
+
+def rebuild(org_ids):
+    """Recompute the summary rows of ``org_ids`` from attendance_records.
+
+    One DELETE and one INSERT ... SELECT ... GROUP BY per organization,
+    each organization in its own transaction.
+    """
+    month = extract('year', attendance_sessions.c.date) * 100 + extract('month', attendance_sessions.c.date)
+    for org_id in org_ids:
+        db.session.execute(delete(attendance_summaries).where(attendance_summaries.c.org_id == org_id))
+        aggregate = (
+            select(attendance_records.c.user_id, attendance_sessions.c.org_id, month, attendance_records.c.status,
+                   func.count())
+            .join(attendance_sessions, attendance_sessions.c.id == attendance_records.c.attendance_session_id)
+            .where(attendance_sessions.c.org_id == org_id)
+            .group_by(attendance_records.c.user_id, attendance_sessions.c.org_id, month, attendance_records.c.status)
+        )
+        db.session.execute(insert(attendance_summaries).from_select(SUMMARY_KEY + ['count'], aggregate))
+        db.session.commit()
+
+
+def _counts(rows):
+    # Baris bernilai 0 (semua presensinya sudah berubah status) tidak ditampilkan
+    counts = defaultdict(int)
+    for status, count in rows:
+        if count:
+            counts[status] += count
+    return dict(counts)
+
+
+def user_summary_queries(user_id, today=None):
+    """Return the queries whose rows ``user_summary`` combines.
+
+    Only sessions dated ``today`` or earlier count towards the rate;
+    schedules create sessions for the whole term ahead of time.
+    """
+    today = today or date.today()
+    summary_query = (
+        select(attendance_summaries.c.org_id, attendance_summaries.c.status, func.sum(attendance_summaries.c.count))
+        .where(attendance_summaries.c.user_id == user_id)
+        .group_by(attendance_summaries.c.org_id, attendance_summaries.c.status)
+    )
+    # Jumlah sesi yang sudah berlangsung per organisasi dari index
+    # (org_id, date), untuk persentase hadir
+    session_query = (
+        select(attendance_sessions.c.org_id, func.count())
+        .where(attendance_sessions.c.org_id.in_(
+            select(attendance_summaries.c.org_id).where(attendance_summaries.c.user_id == user_id)
+        ), attendance_sessions.c.date <= today)
+        .group_by(attendance_sessions.c.org_id)
+    )
+    return summary_query, session_query
+
+
+def user_summary(summary_rows, session_rows):
+    """Per-organization attendance counts and rate of one user."""
+    by_org = defaultdict(list)
+    for org_id, status, count in summary_rows:
+        by_org[org_id].append((status, count))
+    sessions = dict(session_rows)
+
+    result = []
+    for org_id in sorted(by_org):
+        counts = _counts(by_org[org_id])
+        total_sessions = sessions.get(org_id, 0)
+        result.append({
+            'org_id': org_id,
+            'counts': counts,
+            'sessions': total_sessions,
+            'attendance_rate': round(counts.get('hadir', 0) / total_sessions, 4) if total_sessions else None,
+        })
+    return result
+
+
+def organization_summary_query(org_id):
+    return (
+        select(attendance_summaries.c.month, attendance_summaries.c.status, func.sum(attendance_summaries.c.count))
+        .where(attendance_summaries.c.org_id == org_id)
+        .group_by(attendance_summaries.c.month, attendance_summaries.c.status)
+        .order_by(attendance_summaries.c.month)
+    )
+
+
+def organization_summary(rows):
+    """Attendance counts of one organization per month (YYYY-MM) and in total."""
+    by_month = defaultdict(list)
+    for month, status, count in rows:
+        by_month['%04d-%02d' % divmod(month, 100)].append((status, count))
+    return {
+        'counts': _counts((status, count) for _, status, count in rows),
+        'by_month': {month: _counts(counts) for month, counts in by_month.items()},
+    }
+
+
+class AttendanceSummaries:
+    """Keep ``attendance_summaries`` in step with ``attendance_records``.
+
+    Inserted, re-statused and deleted records are turned into +1/-1
+    deltas in ``after_flush`` and written with one upsert-increment
+    statement, inside the same transaction as the records. Core writes
+    skip the flush and pass their deltas to ``apply_deltas``; ``rebuild``
+    (also run by ``flask backfill-attendance-summary``) recomputes an
+    organization from scratch.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['attendance_summaries'] = self
+        app.cli.add_command(backfill_command)
+        if not event.contains(AppSession, 'after_flush', self._after_flush):
+            event.listen(AppSession, 'after_flush', self._after_flush)
+
+    def _after_flush(self, session, flush_context):
+        deltas = Counter()
+        for obj in session.new:
+            if isinstance(obj, AttendanceRecord):
+                deltas[obj.user_id, obj.attendance_session_id, obj.status] += 1
+        for obj in session.dirty:
+            if isinstance(obj, AttendanceRecord):
+                state = inspect(obj)
+                old = tuple(_old_value(state, name) for name in ('user_id', 'attendance_session_id', 'status'))
+                new = (obj.user_id, obj.attendance_session_id, obj.status)
+                if old != new:
+                    deltas[old] -= 1
+                    deltas[new] += 1
+        for obj in session.deleted:
+            if isinstance(obj, AttendanceRecord):
+                state = inspect(obj)
+                deltas[tuple(_old_value(state, name) for name in ('user_id', 'attendance_session_id', 'status'))] -= 1
+        apply_deltas(session, deltas)
+
+
+@click.command('backfill-attendance-summary')
+@click.option('--org-id', 'org_ids', type=int, multiple=True, help='only these organizations (repeatable)')
+def backfill_command(org_ids):
+    """Rebuild attendance_summaries from attendance_records."""
+    if not org_ids:
+        org_ids = db.session.scalars(
+            select(Organization.id).execution_options(include_deleted=True).order_by(Organization.id)
+        ).all()
+    for n, org_id in enumerate(org_ids, 1):
+        rebuild([org_id])
+        click.echo('%d/%d organization %d' % (n, len(org_ids), org_id))
@@ -0,0 +1,364 @@
+"""Delta sync for offline clients, served by /api/sync (sync_api.py).
+
+Every synced table is read in ``(updated_at, id)`` order from the
+watermark stored in the client's sync token, so a sync costs queries
+and bytes proportional to what changed, not to the size of the
+organizations. Rows come back compact: column names once per table and
+each row as a list.
+
+Deletes show up in three ways: users and organizations soft deleted
+since the last sync carry ``deleted_at`` and are listed under
+``deleted``; rows removed by purge.py leave a ``SyncTombstone``; and an
+organization the user is no longer a member of is listed as a deleted
+organization, whose rows the client drops.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import and_, insert, literal, or_, select
+
+from models import (
+    db, utcnow, User, Organization, OrgMember, AttendanceSession, AttendanceRecord, SyncTombstone,
+)
+from scheduler import OPEN, session_window
+
+users = User.__table__
+organizations = Organization.__table__
+org_members = OrgMember.__table__
+attendance_sessions = AttendanceSession.__table__
+attendance_records = AttendanceRecord.__table__
+sync_tombstones = SyncTombstone.__table__
+
+# Kolom yang dikirim per tabel, dalam urutan ini (format ringkas)
+COLUMNS = {
+    'organizations': ('id', 'name', 'enroll_code', 'user_id', 'updated_at'),
+    'users': ('id', 'name', 'email', 'role', 'updated_at'),
+    'org_members': ('id', 'org_id', 'user_id', 'updated_at'),
+    'attendance_sessions': ('id', 'org_id', 'user_id', 'date', 'time_open', 'time_close', 'status', 'schedule_id',
+                            'updated_at'),
+    'attendance_records': ('id', 'attendance_session_id', 'user_id', 'status', 'updated_at'),
+}
+
+# Watermark awal: semua baris
+EPOCH = (datetime(1970, 1, 1), 0)
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='sync-token')
+
+
+def load_token(token, user_id):
+    """Return the watermarks, org ids and issue time (UTC) of a sync token issued to ``user_id``.
+
+    Raises ``ValueError`` for a token that is not ours or not this user's.
+    """
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        raise ValueError('invalid sync token')
+    if data.get('u') != user_id:
+        raise ValueError('sync token belongs to another user')
+    watermarks = {name: (datetime.fromisoformat(at), id) for name, (at, id) in data['w'].items()}
+    return watermarks, set(data['o']), datetime.fromisoformat(data['i'])
+
+
+def dump_token(user_id, org_ids, watermarks, issued):
+    return _serializer().dumps({
+        'u': user_id,
+        'o': sorted(org_ids),
+        'i': issued.isoformat(),
+        'w': {name: [at.isoformat(), id] for name, (at, id) in watermarks.items()},
+    })
+
+
+def member_org_ids(user_id):
+    """Ids of the live organizations ``user_id`` is a member of."""
+    return set(db.session.scalars(
+        select(org_members.c.org_id)
+        .join(organizations, organizations.c.id == org_members.c.org_id)
+        .where(org_members.c.user_id == user_id, organizations.c.deleted_at.is_(None))
+    ))
+
+
+def _filters(name, org_ids):
+    if name == 'organizations':
+        return [organizations.c.id.in_(org_ids)]
+    if name == 'users':
+        return [users.c.id.in_(select(org_members.c.user_id).where(org_members.c.org_id.in_(org_ids)))]
+    if name == 'attendance_records':
+        return [attendance_records.c.attendance_session_id.in_(
+            select(attendance_sessions.c.id).where(attendance_sessions.c.org_id.in_(org_ids))
+        )]
+    return [db.metadata.tables[name].c.org_id.in_(org_ids)]
+
+
+def _after(column, id_column, watermark):
+    at, id = watermark
+    # Bentuk ini memakai index (..., updated_at) sebagai range scan
+    return and_(column >= at, or_(column > at, and_(column == at, id_column > id)))
+
+
+def _compact(value):
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+
+def changes(user_id, token=None, now=None):
+    """Return the changes for ``user_id`` since ``token`` (None for a full sync).
+
+    The result is ``{'token', 'reset', 'has_more', 'changes'}``; ``reset``
+    tells the client to drop its local data first, which happens on the
+    first sync, when the user joined another organization and when the
+    token is older than the kept tombstones. ``has_more`` means a table
+    hit SYNC_PAGE_SIZE and the client should sync again right away with
+    the new token.
+    """
+    config = current_app.config
+    limit = config['SYNC_PAGE_SIZE']
+    now = now or utcnow()
+    # Transaksi yang commit terlambat membawa updated_at sedikit di belakang
+    # baris yang sudah terlihat; watermark dibuat mundur sebesar overlap ini
+    # supaya baris itu tetap terkirim (mungkin dua kali, client cukup upsert)
+    settled = (now - timedelta(seconds=config['SYNC_OVERLAP_SECONDS']), 0)
+
+    org_ids = member_org_ids(user_id)
+    if token is None:
+        watermarks, token_org_ids = {}, set()
+    else:
+        watermarks, token_org_ids, _ = load_token(token, user_id)
+    reset = (
+        token is None
+        or not org_ids <= token_org_ids
+        or watermarks['sync_tombstones'][0] < now - timedelta(days=config['SYNC_TOMBSTONE_DAYS'])
+    )
+    if reset:
+        watermarks = dict.fromkeys(COLUMNS, EPOCH)
+        # Snapshot penuh tidak butuh tombstone lama
+        watermarks['sync_tombstones'] = settled
+
+    result = {}
+    has_more = False
+    for name, columns in COLUMNS.items():
+        table = db.metadata.tables[name]
+        rows = db.session.execute(
+            select(*(table.c[column] for column in columns), *([table.c.deleted_at] if 'deleted_at' in table.c else []))
+            .where(*_filters(name, org_ids), _after(table.c.updated_at, table.c.id, watermarks[name]))
+            .order_by(table.c.updated_at, table.c.id)
+            .limit(limit + 1)
+        ).all() if org_ids else []
+        if len(rows) > limit:
+            rows = rows[:limit]
+            watermarks[name] = (rows[-1].updated_at, rows[-1].id)
+            has_more = True
+        else:
+            watermarks[name] = max(watermarks[name], settled)
+        result[name] = {'columns': list(columns), 'rows': rows, 'deleted': []}
+
+    # Anggota baru bisa saja user lama yang barisnya tidak berubah
+    known = {row.id for row in result['users']['rows']}
+    joined = {row.user_id for row in result['org_members']['rows']} - known
+    if joined and not reset:
+        result['users']['rows'] += db.session.execute(
+            select(*(users.c[column] for column in COLUMNS['users']), users.c.deleted_at)
+            .where(users.c.id.in_(joined))
+        ).all()
+
+    tombstones = db.session.execute(
+        select(sync_tombstones)
+        .where(sync_tombstones.c.org_id.in_(org_ids),
+               _after(sync_tombstones.c.deleted_at, sync_tombstones.c.id, watermarks['sync_tombstones']))
+        .order_by(sync_tombstones.c.deleted_at, sync_tombstones.c.id)
+        .limit(limit + 1)
+    ).all() if org_ids and not reset else []
+    if len(tombstones) > limit:
+        tombstones = tombstones[:limit]
+        watermarks['sync_tombstones'] = (tombstones[-1].deleted_at, tombstones[-1].id)
+        has_more = True
+    else:
+        watermarks['sync_tombstones'] = max(watermarks['sync_tombstones'], settled)
+    for tombstone in tombstones:
+        result[tombstone.table_name]['deleted'].append(tombstone.row_id)
+    # Organisasi yang ditinggalkan: client menghapus semua datanya
+    result['organizations']['deleted'] += sorted(token_org_ids - org_ids)
+
+    for table in result.values():
+        rows = table['rows']
+        table['deleted'] += [row.id for row in rows if getattr(row, 'deleted_at', None) is not None]
+        width = len(table['columns'])
+        table['rows'] = [[_compact(value) for value in row[:width]] for row in rows if getattr(row, 'deleted_at', None) is None]
+
+    return {
+        'token': dump_token(user_id, org_ids, watermarks, now),
+        'reset': reset,
+        'has_more': has_more,
+        'changes': {name: table for name, table in result.items() if table['rows'] or table['deleted']},
+    }
+
+
+def _parse_checked_at(value):
+    # Waktu lokal server, sama seperti jadwal sesi; waktu dengan zona dikonversi
+    checked_at = datetime.fromisoformat(value)
+    if checked_at.tzinfo is not None:
+        checked_at = checked_at.astimezone().replace(tzinfo=None)
+    return checked_at
+
+
+def apply_checkins(user_id, items, state, synced_at=None, now=None):
+    """Save a batch of check-ins queued by an offline client.
+
+    Each item has ``attendance_session_id``, ``status``, an optional
+    ``user_id`` (default: the syncing user; only the organization owner
+    may check in other members) and an optional ``checked_at``
+    (ISO datetime) of when it was taken. A check-in is accepted while the
+    session is open (``state`` is ``SessionScheduler.state``). For a
+    session that is not open, ``checked_at`` must fall inside the
+    session's window. It must also lie between the client's previous
+    sync (``synced_at``, the UTC issue time of its token) and now, and
+    be no more than SYNC_MAX_OFFLINE_DAYS ago.
+
+    An upload only changes records it created itself (``uploaded_by``).
+    Records from the other endpoints, e.g. set by a coach, are left as
+    they are. Sessions, memberships and existing records are loaded
+    with one query each and everything is written in one flush.
+
+    Returns one result dict per item, like /api/presences/batch.
+    """
+    now = now or datetime.now()
+    # Batas bawah checked_at, dalam waktu lokal server seperti jadwal sesi
+    not_before = now - timedelta(days=current_app.config['SYNC_MAX_OFFLINE_DAYS'])
+    if synced_at is not None:
+        not_before = max(not_before, synced_at.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None))
+    results = []
+    valid = {}
+    for item in items:
+        item = item if isinstance(item, dict) else {}
+        session_id = item.get('attendance_session_id')
+        member_id = item.get('user_id', user_id)
+        status = item.get('status')
+        result = {'attendance_session_id': session_id, 'user_id': member_id}
+        results.append(result)
+        try:
+            checked_at = _parse_checked_at(item['checked_at']) if item.get('checked_at') is not None else None
+        except (TypeError, ValueError):
+            result.update(result='error', message='checked_at must be an ISO datetime')
+            continue
+        if not isinstance(session_id, int) or not isinstance(member_id, int) or not isinstance(status, str) or not status:
+            result.update(result='error', message='attendance_session_id, user_id and status are required')
+        elif (session_id, member_id) in valid:
+            result.update(result='error', message='duplicate check-in in batch')
+        else:
+            valid[session_id, member_id] = (status, checked_at, result)
+    if not valid:
+        return results
+
+    session_ids = {session_id for session_id, _ in valid}
+    sessions = {
+        row.id: row for row in db.session.execute(
+            select(attendance_sessions.c.id, attendance_sessions.c.org_id, attendance_sessions.c.date,
+                   attendance_sessions.c.time_open, attendance_sessions.c.time_close,
+                   organizations.c.user_id.label('owner_id'))
+            .join(organizations, organizations.c.id == attendance_sessions.c.org_id)
+            .where(attendance_sessions.c.id.in_(session_ids),
+                   attendance_sessions.c.org_id.in_(member_org_ids(user_id)))
+        )
+    }
+    org_ids = {row.org_id for row in sessions.values()}
+    member_ids = {member_id for _, member_id in valid}
+    members = set(db.session.execute(
+        select(org_members.c.org_id, org_members.c.user_id)
+        .where(org_members.c.org_id.in_(org_ids), org_members.c.user_id.in_(member_ids))
+    ).tuples()) if org_ids else set()
+    existing = {
+        (record.attendance_session_id, record.user_id): record for record in db.session.scalars(
+            select(AttendanceRecord).where(AttendanceRecord.attendance_session_id.in_(sessions),
+                                           AttendanceRecord.user_id.in_(member_ids))
+        )
+    } if sessions else {}
+
+    new_records = []
+    for (session_id, member_id), (status, checked_at, result) in valid.items():
+        session = sessions.get(session_id)
+        if session is None:
+            result.update(result='error', message='attendance session not found')
+            continue
+        if (session.org_id, member_id) not in members:
+            result.update(result='error', message='user is not a member of this organization')
+            continue
+        if member_id != user_id and session.owner_id != user_id:
+            # Presensi atlet lain hanya dari aplikasi pemilik organisasi (pelatih)
+            result.update(result='error', message='only the organization owner can check in other members')
+            continue
+        if state(session_id) != OPEN:
+            opens_at, closes_at = session_window(session.date, session.time_open, session.time_close)
+            if checked_at is None or not opens_at <= checked_at < closes_at:
+                result.update(result='error', message='check-in is outside the attendance session')
+                continue
+            if not not_before <= checked_at <= now:
+                result.update(result='error', message='checked_at is before the last sync, too old or in the future')
+                continue
+        record = existing.get((session_id, member_id))
+        if record is not None and record.status == status:
+            result.update(result='unchanged', record=record)
+        elif record is not None and record.uploaded_by != user_id:
+            result.update(result='error', message='presence was recorded by someone else')
+        elif record is not None:
+            result.update(result='updated', record=record)
+            record.status = status
+        else:
+            record = AttendanceRecord(user_id=member_id, attendance_session_id=session_id, status=status,
+                                      uploaded_by=user_id)
+            new_records.append(record)
+            result.update(result='created', record=record)
+
+    db.session.add_all(new_records)
+    db.session.flush()
+    for result in results:
+        record = result.pop('record', None)
+        if record is not None:
+            result['id'] = record.id
+            result['status'] = record.status
+    return results
+
+
+def record_tombstones(table, ids):
+    """Add a ``SyncTombstone`` per row of ``table`` about to be deleted by id.
+
+    Users have no organization of their own: a purged user gets one
+    tombstone per organization when their memberships are deleted.
+    """
+    if table is users:
+        return
+    if table is org_members:
+        _insert_tombstones(
+            users,
+            select(org_members.c.user_id, org_members.c.org_id)
+            .join(users, users.c.id == org_members.c.user_id)
+            .where(org_members.c.id.in_(ids), users.c.deleted_at.isnot(None))
+        )
+    if table is organizations:
+        query = select(organizations.c.id, organizations.c.id.label('org_id'))
+    elif table is attendance_records:
+        query = select(attendance_records.c.id, attendance_sessions.c.org_id).join(
+            attendance_sessions, attendance_sessions.c.id == attendance_records.c.attendance_session_id)
+    elif table.name in COLUMNS:
+        query = select(table.c.id, table.c.org_id)
+    else:
+        return
+    _insert_tombstones(table, query.where(table.c.id.in_(ids)))
+
+
+def _insert_tombstones(table, query):
+    # query memilih (row_id, org_id)
+    query = query.add_columns(literal(table.name), literal(utcnow(), db.DateTime))
+    db.session.execute(
+        insert(sync_tombstones).from_select(['row_id', 'org_id', 'table_name', 'deleted_at'], query)
+    )
+
+
+def prune_tombstones(days):
+    """Delete tombstones older than ``days``; tokens that old get a full sync instead."""
+    return db.session.execute(
+        sync_tombstones.delete().where(sync_tombstones.c.deleted_at < utcnow() - timedelta(days=days))
+    ).rowcount
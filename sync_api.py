@@ -0,0 +1,71 @@
+from flask import Blueprint, current_app, g, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from auth import token_required
+from extensions import session_scheduler
+from models import db
+from routing import use_primary
+from sync import apply_checkins, changes, load_token
+
+bp = Blueprint('sync', __name__)
+
+
+# Endpoint sinkronisasi client offline: GET ?since=<token> mengambil
+# perubahan sejak token; POST {since, checkins} mengunggah presensi yang
+# diantrekan saat offline lalu mengembalikan perubahan yang sama
+@bp.route('/api/sync', methods=['GET', 'POST'])
+@token_required
+def sync():
+    user_id = g.current_user.id
+    # Replica yang tertinggal lebih dari overlap sync bisa melewatkan baris
+    use_primary()
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        data = data if isinstance(data, dict) else {}
+        since = data.get('since')
+        items = data.get('checkins', [])
+    else:
+        since = request.args.get('since')
+        items = None
+
+    max_rows = current_app.config['SYNC_UPLOAD_MAX_ROWS']
+    if items is not None and (not isinstance(items, list) or len(items) > max_rows):
+        return jsonify({
+            'status': 'error',
+            'message': 'checkins must be a list of at most %d check-ins' % max_rows
+        }), 400
+
+    checkins = None if items is None else []
+    synced_at = None
+    try:
+        # Token dicek dulu supaya check-in tidak tersimpan untuk request yang ditolak
+        if since:
+            synced_at = load_token(since, user_id)[2]
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if items:
+        try:
+            checkins = apply_checkins(user_id, items, session_scheduler.state, synced_at)
+            db.session.commit()
+        except IntegrityError as e:
+            # Check-in yang sama masuk bersamaan lewat /api/presences
+            db.session.rollback()
+            return jsonify({
+                'status': 'error',
+                'message': str(e.orig)
+            }), 409
+
+    data = changes(user_id, since or None)
+    if checkins is not None:
+        data['checkins'] = checkins
+
+    return jsonify({
+        'status': 'success',
+        'data': data,
+        'message': 'sync complete' if not data['has_more'] else 'sync again for more changes'
+    }), 200
@@ -0,0 +1,311 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+from flask import Blueprint, current_app, g, jsonify, request
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+import schema
+from auth import generate_token, token_required
+from extensions import passwords, response_cache
+from loading import load_plan
+from models import db, User, Organization, OrgMember
+from summaries import user_summary, user_summary_queries
+from views import compiled_schema, paginate_by_id, parse_page_args, purge_progress, purge_started
+
+bp = Blueprint('users', __name__)
+
+# Varian schema untuk parameter ?fields= pada endpoint list, dikompilasi
+# saat pertama kali diminta menjadi serializer baris Core (lihat serializers.py)
+USER_LIST_SCHEMAS = {
+    'full': 'users_schema',
+    'summary': 'users_summary_schema',
+}
+
+# Endpoint registrasi
+@bp.route('/api/users/register', methods=['POST'])
+def register():
+    data = request.get_json()
+    email = data.get('email')
+    
+    if not all(k in data for k in ('name', 'email', 'password')):
+        return jsonify({
+            'error': 'missing required fields: name, email or password'
+            }), 400
+    
+    # User yang sudah di-soft delete tetap memegang emailnya sampai dipurge
+    if User.query.filter_by(email=email).execution_options(include_deleted=True).first():
+        return jsonify({
+            'status': 'error',
+            'message': 'email already used'
+        }), 400
+
+    hashed_password = passwords.hash(data['password'])
+    new_user = User(
+        name=data['name'],
+        email=data['email'],
+        password=hashed_password,
+    )
+
+    try:
+        db.session.add(new_user)
+        db.session.commit()
+        result = schema.user_register_schema.dump(new_user)
+        return jsonify({
+            'status': 'success',
+            'data': result,
+            'message': 'user registered successfully'
+        }), 201
+
+    except IntegrityError:
+        # Email yang sama didaftarkan bersamaan oleh request lain
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': 'email already used'
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def _read_import_rows():
+    """Return (rows, org_id) from a JSON array/object or an uploaded CSV file."""
+    org_id = request.args.get('org_id', type=int)
+    upload = request.files.get('file')
+    if upload is not None or request.mimetype == 'text/csv':
+        text = (upload.read() if upload is not None else request.get_data()).decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(text))), org_id or request.form.get('org_id', type=int)
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        org_id = org_id or data.get('org_id')
+        data = data.get('users')
+    if not isinstance(data, list):
+        raise ValueError('send a JSON array of users, {"users": [...]} or a CSV file with name,email,password')
+    return data, org_id
+
+
+# Endpoint import banyak user sekaligus (JSON atau CSV), opsional langsung
+# didaftarkan sebagai anggota satu organisasi
+@bp.route('/api/users/import', methods=['POST'])
+def import_users():
+    try:
+        rows, org_id = _read_import_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    max_rows = current_app.config['IMPORT_MAX_ROWS']
+    if not rows or len(rows) > max_rows:
+        return jsonify({
+            'status': 'error',
+            'message': 'between 1 and %d users are required' % max_rows
+        }), 400
+    organization = db.session.get(Organization, org_id) if isinstance(org_id, int) else None
+    if org_id is not None and organization is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'organization not found'
+        }), 404
+
+    # Validasi semua baris dulu
+    results = []
+    valid = {}
+    for n, row in enumerate(rows, 1):
+        row = row if isinstance(row, dict) else {}
+        email = row.get('email')
+        result = {'row': n, 'email': email}
+        results.append(result)
+        if not all(isinstance(row.get(k), str) and row.get(k) for k in ('name', 'email', 'password')):
+            result.update(result='error', message='missing required fields: name, email or password')
+        elif email in valid:
+            result.update(result='error', message='duplicate email in import')
+        else:
+            valid[email] = (row, result)
+
+    # Satu query IN untuk semua email yang sudah terdaftar
+    existing = set(db.session.scalars(
+        select(User.email).where(User.email.in_(valid)).execution_options(include_deleted=True)
+    )) if valid else set()
+    for email in existing:
+        valid.pop(email)[1].update(result='exists', message='email already used')
+
+    created = 0
+    if valid:
+        hashes = passwords.hash_many([row['password'] for row, _ in valid.values()])
+        # Kolom role dari file diabaikan: endpoint ini tanpa auth, jadi semua
+        # user baru mendapat role default seperti lewat register
+        users = [
+            {'name': row['name'], 'email': email, 'password': pwhash}
+            for (email, (row, _)), pwhash in zip(valid.items(), hashes)
+        ]
+        try:
+            db.session.execute(insert(User.__table__), users)
+            ids = dict(db.session.execute(select(User.email, User.id).where(User.email.in_(valid))).all())
+            if organization is not None:
+                db.session.execute(insert(OrgMember.__table__), [
+                    {'org_id': organization.id, 'user_id': id} for id in ids.values()
+                ])
+                response_cache.invalidate_on_commit(db.session, [organization])
+            db.session.commit()
+        except IntegrityError:
+            # Email yang sama didaftarkan bersamaan oleh request lain
+            db.session.rollback()
+            return jsonify({
+                'status': 'error',
+                'message': 'some emails were registered while importing, please retry'
+            }), 409
+
+        for email, (_, result) in valid.items():
+            result.update(result='created', id=ids[email])
+        created = len(valid)
+
+    return jsonify({
+        'status': 'success' if created else 'error',
+        'data': results,
+        'message': '%d of %d users imported' % (created, len(rows))
+    }), 201 if created else 400
+
+# Endpoint login 
+@bp.route('/api/users/login', methods=['POST'])
+def login():
+    data = request.get_json()
+    email = data.get('email')
+    password = data.get('password')
+
+    user = User.query.options(*load_plan('user_login')).filter_by(email=email).first()
+
+    if user and passwords.verify(user.password, password):
+        result = schema.user_login_schema.dump(user)
+        # Perbarui hash lama ke metode/cost yang sedang dikonfigurasi
+        if passwords.needs_rehash(user.password):
+            user.password = passwords.hash(password)
+            db.session.commit()
+        return jsonify({
+            'status': 'success',
+            'data': result,
+            'token': generate_token(user),
+            'message': 'user logged in successfully'
+        }), 200
+    else:
+        return jsonify({
+            'status': 'error',
+            'message': 'invalid email or password'
+        }), 401   
+
+# Endpoint data user dari token, tanpa query ke database
+@bp.route('/api/users/me', methods=['GET'])
+@token_required
+def get_current_user():
+    return jsonify({
+        'status': 'success',
+        'data': g.current_user._asdict(),
+        'message': 'user found'
+    }), 200
+
+# Endpoint menampilkan semua data User
+@bp.route('/api/users', methods=['GET'])
+def get_users():
+    variant = request.args.get('fields', 'full')
+    if variant not in USER_LIST_SCHEMAS:
+        return jsonify({
+            'status': 'error',
+            'message': 'fields must be one of: ' + ', '.join(USER_LIST_SCHEMAS)
+        }), 400
+
+    try:
+        limit, cursor = parse_page_args()
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    users, next_cursor = paginate_by_id(User, limit, cursor)
+
+    if not users:
+        return jsonify({
+            'status': 'not found',
+            'message': 'user not found',
+            'data': [],
+            'next_cursor': None
+        })
+
+    result = compiled_schema(USER_LIST_SCHEMAS[variant]).dump(users)
+    return jsonify({
+        'status': 'success',
+        'data': result,
+        'next_cursor': next_cursor,
+        'message': 'users found'
+    })
+
+# Endpoint menampilkan satu data User berdasarkan ID
+@bp.route('/api/users/<int:id>', methods=['GET'])
+@response_cache.cached('user')
+def get_user(id):
+    try:
+        user = User.query.options(*load_plan('user')).get_or_404(id)
+        result = schema.user_schema.dump(user)
+        # Statistik dari tabel ringkasan, bukan dari seluruh riwayat presensi
+        summary_query, session_query = user_summary_queries(id)
+        result['attendance_summary'] = user_summary(
+            db.session.execute(summary_query).all(), db.session.execute(session_query).all()
+        )
+        return jsonify({
+            'status': 'success',
+            'data': result,
+            'message': 'user found'
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 404
+
+# Endpoint update data User berdasarkan ID
+@bp.route('/api/users/<int:id>', methods=['PUT'])
+def update_user(id):
+    user = User.query.get_or_404(id)
+    data = request.get_json() 
+
+    for field in ['nama', 'email', 'password', 'tanggal_lahir', 'alamat', 'no_telepon', 'jenis_kelamin', 'role']:
+        if field in data:
+            setattr(user, field, passwords.hash(data[field]) if field == 'password' else data[field])
+
+    db.session.commit()
+    # commit meng-expire objek, jadi muat ulang sesuai rencana schema
+    user = User.query.options(*load_plan('user')).get(id)
+    result = schema.user_schema.dump(user)
+
+    return jsonify({
+        'status': 'success',
+        'data': result,
+        'message': 'user updated successfully'
+    }), 200
+
+# Endpoint menghapus data user berdasarkan id
+@bp.route('/api/users/<int:id>', methods=['DELETE'])
+def delete_user(id):
+    user = User.query.get_or_404(id)
+
+    # Hanya ditandai; data terkait dihapus bertahap oleh purge_queue
+    deleted_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    user.deleted_at = deleted_at
+    for org in user.organizations:
+        org.deleted_at = deleted_at
+    db.session.commit()
+
+    return purge_started('user', id, 'user deleted, related data is being removed')
+
+
+# Endpoint progres penghapusan user oleh purge job
+@bp.route('/api/users/<int:id>/deletion', methods=['GET'])
+def get_user_deletion(id):
+    return purge_progress('user', id)
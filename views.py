@@ -0,0 +1,105 @@
+"""Request parsing and response helpers shared by the blueprints."""
+from datetime import date
+from functools import lru_cache
+
+from flask import jsonify, request
+from sqlalchemy import select
+
+import schema
+from extensions import purge_queue
+from models import db
+from serializers import compile_schema
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 200
+
+
+@lru_cache(maxsize=None)
+def compiled_schema(name):
+    """Return the Core row serializer for ``schema.<name>``, compiled on first use."""
+    return compile_schema(getattr(schema, name))
+
+
+def id_cursor(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('cursor must be an integer')
+
+
+def date_id_cursor(value):
+    """Parse a ``YYYY-MM-DD_id`` cursor, as made by ``format_date_id_cursor``."""
+    day, _, id = value.partition('_')
+    try:
+        return date.fromisoformat(day), int(id)
+    except ValueError:
+        raise ValueError('cursor must be a next_cursor value (YYYY-MM-DD_id)')
+
+
+def format_date_id_cursor(row):
+    return '%s_%d' % (row.date.isoformat(), row.id)
+
+
+def parse_page_args(args=None, parse_cursor=id_cursor):
+    """Read ``limit`` and ``cursor`` query params for keyset pagination."""
+    args = request.args if args is None else args
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    cursor = parse_cursor(args['cursor']) if 'cursor' in args else None
+    return min(limit, MAX_PAGE_LIMIT), cursor
+
+
+def paginate_by_id(model, limit, cursor):
+    """Return one page of ``model``'s live table rows ordered by id, plus the next cursor.
+
+    Fetches ``limit + 1`` rows so we know whether another page exists
+    without a separate COUNT query.
+    """
+    query = select(model.__table__).where(model.__table__.c.deleted_at.is_(None))
+    if cursor is not None:
+        query = query.where(model.id > cursor)
+    rows = db.session.execute(query.order_by(model.id).limit(limit + 1)).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def parse_date_range(args=None):
+    """Read optional ``from``/``to`` query params (YYYY-MM-DD, inclusive)."""
+    args = request.args if args is None else args
+    try:
+        start = date.fromisoformat(args['from']) if 'from' in args else None
+        end = date.fromisoformat(args['to']) if 'to' in args else None
+    except ValueError:
+        raise ValueError('from and to must be dates in YYYY-MM-DD format')
+    if start and end and start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+
+def purge_started(kind, id, message):
+    response = jsonify({
+        'status': 'success',
+        'data': purge_queue.enqueue(kind, id),
+        'message': message
+    })
+    response.status_code = 202
+    response.headers['Location'] = '/api/%ss/%d/deletion' % (kind, id)
+    return response
+
+
+def purge_progress(kind, id):
+    job = purge_queue.progress(kind, id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': '%s is not being deleted' % kind
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'data': job,
+        'message': 'deletion %s' % job['status']
+    }), 200